@@ -13,13 +13,16 @@ class AddonManager:
         self.hooks = hookpoints or {}
         self.css_files = []
         self.status = []
+        # Plugins with their own page, linked from every device row
+        self._device_button_plugins = []
 
     def load_addons(self, addon_dir='addons', template_target='templates/addons'):
         os.makedirs(template_target, exist_ok=True)
-        for fname in os.listdir(addon_dir):
-            if not fname.endswith('.py'):
-                continue
-            fpath = os.path.join(addon_dir, fname)
+        with os.scandir(addon_dir) as entries:
+            entries = [e for e in entries if e.name.endswith('.py') and e.is_file()]
+        for entry in entries:
+            fname = entry.name
+            fpath = entry.path
             modname = fname[:-3]
             plugin_status = {"name": modname, "status": "error", "error": "", "file": fname}
             try:
@@ -27,28 +30,28 @@ class AddonManager:
                 mod = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(mod)
 
-                name = mod.addon_meta["name"] if hasattr(mod, "addon_meta") and "name" in mod.addon_meta else modname
-                plugin_status["name"] = name
+                meta = getattr(mod, "addon_meta", None)
+                plugin_status["name"] = meta.get("name", modname) if meta else modname
 
                 # HTML-Integration
-                if hasattr(mod, "addon_meta") and "html" in mod.addon_meta:
-                    html_content = mod.addon_meta["html"]
+                html_content = meta.get("html") if meta else None
+                if html_content is not None:
                     html_path = Path(template_target) / f"{modname}.html"
-                    with open(html_path, "w", encoding="utf-8") as f:
-                        f.write(textwrap.dedent(html_content).strip())
+                    new_bytes = textwrap.dedent(html_content).strip().encode("utf-8")
+                    # Only rewrite when the content changed, so Jinja's mtime-based cache stays valid
+                    if not html_path.exists() or html_path.read_bytes() != new_bytes:
+                        html_path.write_bytes(new_bytes)
 
-                    # Device-Button automatisch als Hook registrieren
-                    def make_button(plugin_name):
-                        return lambda dev: f'<a class="btn btn-sm btn-outline-secondary" href="/disks/addons/{plugin_name}/{dev}">{plugin_name}</a>'
-                    self.hooks.setdefault("device_buttons", []).append(make_button(modname))
+                    # Device-Button automatisch registrieren
+                    if modname not in self._device_button_plugins:
+                        self._device_button_plugins.append(modname)
 
-                if hasattr(mod, "addon_meta"):
-                    meta = mod.addon_meta
-                    if "html_hooks" in meta:
-                        for hookname, func in meta["html_hooks"].items():
-                            self.hooks.setdefault(hookname, []).append(func)
-                    if "css" in meta:
-                        self.css_files.append(meta["css"])
+                if meta:
+                    for hookname, func in meta.get("html_hooks", {}).items():
+                        self.hooks.setdefault(hookname, []).append(func)
+                    css = meta.get("css")
+                    if css is not None:
+                        self.css_files.append(css)
 
                 if hasattr(mod, "register"):
                     mod.register(self.app, self.core)
@@ -59,6 +62,13 @@ class AddonManager:
                 plugin_status["error"] = traceback.format_exc(limit=3)
             self.status.append(plugin_status)
 
+    def render_device_buttons(self, dev, _tpl='<a class="btn btn-sm btn-outline-secondary" href="/disks/addons/{p}/{d}">{p}</a>'.format):
+        """Render the plugin buttons for a device row, followed by any "device_buttons" html_hooks."""
+        html = " ".join(_tpl(p=p, d=dev) for p in self._device_button_plugins)
+        if self.hooks.get("device_buttons"):
+            html = " ".join(filter(None, (html, self.render_hooks("device_buttons", dev))))
+        return html
+
     def render_hooks(self, hookname, *args, **kwargs):
         html = []
         for func in self.hooks.get(hookname, []):
@@ -1,9 +1,19 @@
-from flask import Blueprint, render_template, jsonify, current_app, request, flash, redirect, url_for, session
+from flask import Blueprint, render_template, current_app, request, flash, redirect, url_for, session
 import requests
+import json
 import os
 import re
+import threading
+import time
+from functools import wraps
 from pathlib import Path
-from user_management import login_required, get_user_role_names
+from user_management import login_required, get_cached_user_role_names, current_user_has_role
+
+# Use orjson for faster JSON parsing if available
+try:
+    import orjson
+except ImportError:
+    orjson = None  # orjson is optional
 
 blueprint = Blueprint('plugin_manager', __name__, url_prefix='/disks/pluginmanager')
 
@@ -15,6 +25,21 @@ addon_meta = {
 # Default plugin repository (GitHub repo or API endpoint)
 REMOTE_PLUGIN_REPO = "https://raw.githubusercontent.com/ChristianHandy/Linux-Management-Dashboard-Plugins/main/plugins.json"
 
+# Allowed plugin IDs and plugin filenames (alphanumeric and underscores only)
+_PLUGIN_ID_RE = re.compile(r'[A-Za-z0-9_]+')
+_PLUGIN_FILE_RE = re.compile(r'[A-Za-z0-9_]+\.py')
+
+# Cached copy of the remote plugin index, revalidated with ETag/Last-Modified
+_REMOTE_CACHE = {"etag": None, "last_modified": None, "parsed": None, "fetched_at": 0.0}
+_REMOTE_CACHE_LOCK = threading.Lock()
+_http = requests.Session()
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def _dumps(obj):
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode('utf-8')
+
 def sanitize_path(base_dir, filename):
     """
     Safely construct and validate a path within the base directory.
@@ -47,16 +72,71 @@ def sanitize_path(base_dir, filename):
     except (ValueError, OSError):
         return None
 
-def current_user_has_role(*roles):
-    """Check if the current logged-in user has any of the specified roles."""
-    user_id = session.get("user_id")
-    if not user_id:
-        return False
-    user_roles = get_user_role_names(user_id)
-    # Admin has access to everything
-    if 'admin' in user_roles:
-        return True
-    return any(role in user_roles for role in roles)
+def _fetch_remote_plugins(max_age=60, timeout=5):
+    """
+    Return the list of plugins from the remote repository.
+    
+    The parsed index is reused for max_age seconds; after that the request is
+    made conditional on the cached ETag/Last-Modified so an unchanged index
+    costs a 304 instead of a full download. The request runs without holding
+    the cache lock, and a failed refresh falls back to the cached index.
+    
+    Returns:
+        list: Plugin entries from the repository
+        None: If the repository could not be fetched and nothing is cached
+    
+    Raises:
+        requests.RequestException: If the request failed and nothing is cached
+    """
+    with _REMOTE_CACHE_LOCK:
+        parsed = _REMOTE_CACHE["parsed"]
+        if parsed is not None and time.monotonic() - _REMOTE_CACHE["fetched_at"] < max_age:
+            return parsed
+        etag = _REMOTE_CACHE["etag"]
+        last_modified = _REMOTE_CACHE["last_modified"]
+    
+    headers = {}
+    if parsed is not None:
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    
+    try:
+        response = _http.get(REMOTE_PLUGIN_REPO, headers=headers, timeout=timeout)
+        if response.status_code == 304 and parsed is not None:
+            with _REMOTE_CACHE_LOCK:
+                _REMOTE_CACHE["fetched_at"] = time.monotonic()
+            return parsed
+        if response.status_code != 200:
+            return parsed
+        plugins = _loads(response.content).get('plugins', [])
+    except (requests.RequestException, ValueError):
+        if parsed is None:
+            raise
+        return parsed
+    
+    with _REMOTE_CACHE_LOCK:
+        _REMOTE_CACHE["parsed"] = plugins
+        _REMOTE_CACHE["etag"] = response.headers.get("ETag")
+        _REMOTE_CACHE["last_modified"] = response.headers.get("Last-Modified")
+        _REMOTE_CACHE["fetched_at"] = time.monotonic()
+    return plugins
+
+def require_role(*roles, message='You do not have permission to do that.'):
+    """
+    Decorator that only lets logged-in users with one of the given roles through.
+    Everyone else is sent back to the plugin manager with the given flash message.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            if not session.get("user_id") or not current_user_has_role(*roles):
+                flash(message)
+                return redirect(url_for('plugin_manager.plugin_manager_index'))
+            return f(*args, **kwargs)
+        return wrapped
+    return decorator
 
 def register(app, core):
     app.register_blueprint(blueprint)
@@ -71,23 +151,20 @@ def plugin_manager_index():
     is_admin = False
     user_id = session.get("user_id")
     if user_id:
-        user_roles = get_user_role_names(user_id)
-        is_admin = 'admin' in user_roles
+        is_admin = 'admin' in get_cached_user_role_names(user_id)
     
     # Fetch available remote plugins
     remote_plugins = []
     try:
-        response = requests.get(REMOTE_PLUGIN_REPO, timeout=5)
-        if response.status_code == 200:
-            remote_plugins = response.json().get('plugins', [])
+        remote_plugins = _fetch_remote_plugins() or []
     except Exception as e:
         # Log but don't crash if remote fetch fails
         print(f"Failed to fetch remote plugins: {e}")
     
-    # Mark which remote plugins are already installed
-    installed_names = {p['file'].replace('.py', '') for p in installed_plugins}
-    for plugin in remote_plugins:
-        plugin['installed'] = plugin.get('id', '') in installed_names
+    # Mark which remote plugins are already installed (copies, so the cached index stays untouched)
+    installed_names = {p['file'][:-3] for p in installed_plugins if p['file'].endswith('.py')}
+    remote_plugins = [{**plugin, 'installed': plugin.get('id', '') in installed_names}
+                      for plugin in remote_plugins]
     
     return render_template('disks/plugin_manager.html', 
                          plugins=installed_plugins, 
@@ -98,31 +175,25 @@ def plugin_manager_index():
 @login_required
 def plugin_manager_json():
     mgr = getattr(current_app, 'addon_mgr', None)
-    return jsonify(mgr.status if mgr else [])
+    return current_app.response_class(_dumps(mgr.status if mgr else []), mimetype='application/json')
 
 @blueprint.route('/install/<plugin_id>', methods=['POST'])
 @login_required
+@require_role('admin', message='Only administrators can install plugins.')
 def install_plugin(plugin_id):
     """Install a plugin from the remote repository"""
-    # Require admin role to install plugins
-    user_id = session.get("user_id")
-    if not user_id or not current_user_has_role('admin'):
-        flash('Only administrators can install plugins.')
-        return redirect(url_for('plugin_manager.plugin_manager_index'))
-    
     # Validate plugin_id (alphanumeric and underscores only)
-    if not re.match(r'^[a-zA-Z0-9_]+$', plugin_id):
+    if not _PLUGIN_ID_RE.fullmatch(plugin_id):
         flash('Invalid plugin ID.')
         return redirect(url_for('plugin_manager.plugin_manager_index'))
     
     try:
         # Fetch available plugins
-        response = requests.get(REMOTE_PLUGIN_REPO, timeout=10)
-        if response.status_code != 200:
+        plugins_data = _fetch_remote_plugins(timeout=10)
+        if plugins_data is None:
             flash('Failed to fetch plugin repository.')
             return redirect(url_for('plugin_manager.plugin_manager_index'))
         
-        plugins_data = response.json().get('plugins', [])
         plugin_info = next((p for p in plugins_data if p.get('id') == plugin_id), None)
         
         if not plugin_info:
@@ -135,11 +206,6 @@ def install_plugin(plugin_id):
             flash('Plugin URL not found.')
             return redirect(url_for('plugin_manager.plugin_manager_index'))
         
-        plugin_response = requests.get(plugin_url, timeout=10)
-        if plugin_response.status_code != 200:
-            flash(f'Failed to download plugin from {plugin_url}')
-            return redirect(url_for('plugin_manager.plugin_manager_index'))
-        
         # Save plugin to addons directory
         plugin_filename = f"{plugin_id}.py"
         plugin_path = sanitize_path('addons', plugin_filename)
@@ -154,9 +220,21 @@ def install_plugin(plugin_id):
             flash(f'Plugin {plugin_id} is already installed.')
             return redirect(url_for('plugin_manager.plugin_manager_index'))
         
-        # Write plugin file
-        with open(plugin_path, 'w', encoding='utf-8') as f:
-            f.write(plugin_response.text)
+        # Stream the download to a temporary file and move it into place once
+        # complete, so load_addons never sees a half-written plugin
+        tmp_path = plugin_path.with_suffix('.py.tmp')
+        with _http.get(plugin_url, timeout=10, stream=True) as plugin_response:
+            if plugin_response.status_code != 200:
+                flash(f'Failed to download plugin from {plugin_url}')
+                return redirect(url_for('plugin_manager.plugin_manager_index'))
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in plugin_response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                os.replace(tmp_path, plugin_path)
+            finally:
+                if tmp_path.exists():
+                    os.remove(tmp_path)
         
         flash(f'Plugin {plugin_id} installed successfully! Please restart the application to activate.')
         
@@ -167,16 +245,11 @@ def install_plugin(plugin_id):
 
 @blueprint.route('/uninstall/<plugin_file>', methods=['POST'])
 @login_required
+@require_role('admin', message='Only administrators can uninstall plugins.')
 def uninstall_plugin(plugin_file):
     """Uninstall (delete) a plugin"""
-    # Require admin role to uninstall plugins
-    user_id = session.get("user_id")
-    if not user_id or not current_user_has_role('admin'):
-        flash('Only administrators can uninstall plugins.')
-        return redirect(url_for('plugin_manager.plugin_manager_index'))
-    
     # Validate filename (must end with .py and contain only safe characters)
-    if not re.match(r'^[a-zA-Z0-9_]+\.py$', plugin_file):
+    if not _PLUGIN_FILE_RE.fullmatch(plugin_file):
         flash('Invalid plugin filename.')
         return redirect(url_for('plugin_manager.plugin_manager_index'))
     
@@ -11,7 +11,11 @@
 import paramiko
 import json
 import re
+import threading
+import time
 import disktool_core
+import ssh_pool
+from concurrent.futures import ThreadPoolExecutor
 from flask import request, flash, redirect, url_for
 
 addon_meta = {
@@ -28,8 +32,11 @@ addon_meta = {
       <p>Local device context: <strong>{{ device }}</strong></p>
       
       <div class="card mb-4">
-        <div class="card-header">
+        <div class="card-header d-flex justify-content-between align-items-center">
           <h5>Available Remote Systems</h5>
+          {% if remotes %}
+          <a href="{{ url_for('remote_disk_sync_all') }}" class="btn btn-sm btn-success">Sync All</a>
+          {% endif %}
         </div>
         <div class="card-body">
           {% if remotes %}
@@ -69,23 +76,37 @@ def execute_remote_command(host, port, username, command):
     Execute a command on a remote host via SSH.
     Returns the output as a string or None if failed.
     
+    The SSH connection is taken from a pool and left open for later commands.
+    If a broken pooled connection fails before the command is started, it is
+    evicted and the command is started once more on a fresh connection. Errors
+    after the command was sent are returned as they are, so commands such as
+    wipefs/mkfs never run twice.
+    
     Security Note: Uses AutoAddPolicy which accepts any host key, making this 
     vulnerable to MITM attacks. This is consistent with the existing implementation
     in app.py. For production use, consider using WarningPolicy and maintaining 
     a known_hosts file.
     """
     try:
-        ssh = paramiko.SSHClient()
-        # Security Note: AutoAddPolicy accepts any host key, making this vulnerable to MITM attacks.
-        # For production, use WarningPolicy or maintain a known_hosts file.
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(host, port=port, username=username, timeout=10)
+        for attempt in range(2):
+            try:
+                ssh = ssh_pool.get(host, username, port=port)
+                stdin, stdout, stderr = ssh.exec_command(command)
+                break
+            except paramiko.AuthenticationException:
+                raise
+            except (paramiko.SSHException, EOFError, OSError):
+                ssh_pool.evict(host, username, port=port)
+                if attempt:
+                    raise
         
-        stdin, stdout, stderr = ssh.exec_command(command)
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        
-        ssh.close()
+        # The command is running now; from here on it is never retried
+        try:
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
+        except (paramiko.SSHException, EOFError, OSError):
+            ssh_pool.evict(host, username, port=port)
+            raise
         
         if error:
             return None, error
@@ -114,6 +135,88 @@ def list_remote_disks(host, port, username):
         return None, str(e)
 
 
+# Combined disk listing and SMART health summary, run as a single SSH command
+SNAPSHOT_COMMAND = (
+    "lsblk -J -d -o NAME,SIZE,MODEL,TYPE; echo ---SEP---; "
+    "for d in $(lsblk -dno NAME); do echo ===$d===; sudo smartctl -H /dev/$d 2>&1; done"
+)
+SNAPSHOT_TTL = 30
+
+# Cached snapshots keyed by (host, port, username), stored as (monotonic time, snapshot)
+_SNAPSHOT_CACHE = {}
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def _parse_snapshot(output):
+    """Split SNAPSHOT_COMMAND output into disks and per-disk SMART health text."""
+    lsblk_part, _, smart_part = output.partition('---SEP---\n')
+    data = json.loads(lsblk_part)
+    disks = [d for d in data.get('blockdevices', []) if d.get('type') == 'disk']
+    
+    smart = {}
+    current = None
+    for line in smart_part.splitlines():
+        m = re.match(r'^===(.+)===$', line)
+        if m:
+            current = m.group(1)
+            smart[current] = []
+        elif current is not None:
+            smart[current].append(line)
+    smart = {dev: "\n".join(lines) for dev, lines in smart.items()}
+    
+    health = {}
+    for dev, text in smart.items():
+        m = re.search(r'self-assessment test result:\s*(\S+)', text)
+        health[dev] = m.group(1) if m else None
+    
+    return {"disks": disks, "smart": smart, "health": health}
+
+
+def remote_snapshot(host, port, username, max_age=SNAPSHOT_TTL):
+    """
+    Get the disk list and SMART health summary of a remote system in one SSH round-trip.
+    Results are cached for max_age seconds per (host, port, username).
+    Returns a snapshot dictionary or None if failed.
+    """
+    key = (host, port, username)
+    with _SNAPSHOT_LOCK:
+        cached = _SNAPSHOT_CACHE.get(key)
+    if cached and time.monotonic() - cached[0] < max_age:
+        return cached[1], None
+    
+    output, error = execute_remote_command(host, port, username, SNAPSHOT_COMMAND)
+    if error:
+        return None, error
+    
+    try:
+        snapshot = _parse_snapshot(output)
+    except Exception as e:
+        return None, str(e)
+    
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT_CACHE[key] = (time.monotonic(), snapshot)
+    return snapshot, None
+
+
+def remote_snapshots(targets, max_workers=8):
+    """
+    Fetch snapshots for several (host, port, username) targets concurrently.
+    Each target waits on its own SSH round-trip in a worker thread, so the total
+    time is that of the slowest remote rather than the sum.
+    Returns a list of (snapshot, error) tuples in the order of targets.
+    """
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as ex:
+        return list(ex.map(lambda t: remote_snapshot(*t), targets))
+
+
+def invalidate_remote_snapshot(host, port, username):
+    """Discard the cached snapshot so the next request queries the remote system again."""
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT_CACHE.pop((host, port, username), None)
+
+
 def get_remote_smart(host, port, username, device):
     """
     Get SMART data from a remote disk.
@@ -159,6 +262,7 @@ def format_remote_disk(host, port, username, device, fs_type):
         return False, "Filesystem not supported"
     
     output, error = execute_remote_command(host, port, username, command)
+    invalidate_remote_snapshot(host, port, username)
     
     if error:
         return False, error
@@ -212,18 +316,25 @@ def register(app, core):
     
     # Helper to check roles
     def current_user_has_role(*roles):
-        user_id = session.get("user_id")
-        if not user_id:
-            return False
         try:
             import user_management
-            user_roles = user_management.get_user_role_names(user_id)
-            if 'admin' in user_roles:
-                return True
-            return any(role in user_roles for role in roles)
+            return user_management.current_user_has_role(*roles)
         except:
             return False
     
+    # Helper to guard mutating routes; sessions from the legacy login have no
+    # user_id and are let through, as before
+    def require_role(*roles, message='You do not have permission to do that.'):
+        def decorator(f):
+            @wraps(f)
+            def wrapped(*args, **kwargs):
+                if session.get("user_id") and not current_user_has_role(*roles):
+                    flash(message)
+                    return redirect(url_for('disks_index'))
+                return f(*args, **kwargs)
+            return wrapped
+        return decorator
+    
     # Helper to get username from session
     def get_username():
         """Get username from session, default to 'root'"""
@@ -252,30 +363,50 @@ def register(app, core):
         # Get username using helper
         username = get_username()
         
-        # List disks on remote
-        disks, error = list_remote_disks(remote['host'], remote['port'], username)
+        # List disks and their SMART health on remote
+        snapshot, error = remote_snapshot(remote['host'], remote['port'], username)
         
         if error:
             flash(f'Error listing remote disks: {error}')
-            disks = []
+            snapshot = {"disks": [], "health": {}}
         
         return render_template('disks/remote_list.html', 
                              remote=remote, 
-                             disks=disks,
+                             disks=snapshot["disks"],
+                             health=snapshot["health"],
                              username=username)
     
     @app.route("/disks/remote/sync/<int:remote_id>")
     @login_required
+    @require_role('operator', 'admin', message='You need operator or admin role to sync remote disks.')
     def remote_disk_sync(remote_id):
         """Sync/refresh disk list for a remote system."""
-        # Require operator or admin role
-        if session.get("user_id") and not current_user_has_role('operator', 'admin'):
-            flash('You need operator or admin role to sync remote disks.')
-            return redirect(url_for('disks_index'))
+        remote = get_remote_by_id(remote_id)
+        if remote:
+            invalidate_remote_snapshot(remote['host'], remote['port'], get_username())
         
         flash('Remote disk sync initiated')
         return redirect(url_for('remote_disk_list', remote_id=remote_id))
     
+    @app.route("/disks/remote/sync_all")
+    @login_required
+    @require_role('operator', 'admin', message='You need operator or admin role to sync remote disks.')
+    def remote_disk_sync_all():
+        """Refresh the disk snapshots of all remote systems at once."""
+        username = get_username()
+        remotes = core.list_remotes()
+        targets = [(r['host'], r['port'], username) for r in remotes]
+        for target in targets:
+            invalidate_remote_snapshot(*target)
+        
+        results = remote_snapshots(targets)
+        failed = [r['name'] for r, (_, error) in zip(remotes, results) if error]
+        if failed:
+            flash(f'Synced {len(remotes) - len(failed)} of {len(remotes)} remotes; failed: {", ".join(failed)}')
+        else:
+            flash(f'Synced {len(remotes)} remotes')
+        return redirect(request.referrer or url_for('disks_index'))
+    
     @app.route("/disks/remote/smart/<int:remote_id>/<device>")
     @login_required
     def remote_disk_smart(remote_id, device):
@@ -303,13 +434,9 @@ def register(app, core):
     
     @app.route("/disks/remote/format/<int:remote_id>/<device>", methods=['GET', 'POST'])
     @login_required
+    @require_role('operator', 'admin', message='You need operator or admin role to format remote disks.')
     def remote_disk_format(remote_id, device):
         """Format a disk on a remote system."""
-        # Require operator or admin role
-        if session.get("user_id") and not current_user_has_role('operator', 'admin'):
-            flash('You need operator or admin role to format remote disks.')
-            return redirect(url_for('disks_index'))
-        
         # Get remote details using helper
         remote = get_remote_by_id(remote_id)
         
@@ -337,13 +464,9 @@ def register(app, core):
     
     @app.route("/disks/remote/smart_test/<int:remote_id>/<device>/<mode>")
     @login_required
+    @require_role('operator', 'admin', message='You need operator or admin role to run SMART tests on remote disks.')
     def remote_disk_smart_test(remote_id, device, mode):
         """Start a SMART test on a remote disk."""
-        # Require operator or admin role
-        if session.get("user_id") and not current_user_has_role('operator', 'admin'):
-            flash('You need operator or admin role to run SMART tests on remote disks.')
-            return redirect(url_for('disks_index'))
-        
         # Get remote details using helper
         remote = get_remote_by_id(remote_id)
         
@@ -1,6 +1,9 @@
-from flask import Flask, render_template, redirect, session, request, flash, jsonify, send_file, url_for
-import json, threading, paramiko, os, secrets
-from updater import run_update
+from flask import Flask, Response, render_template, redirect, session, request, flash, jsonify, url_for
+import hmac, json, mmap, threading, paramiko, os, re, secrets, socket, sys, time
+import jinja2
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from updater import UPDATE_POOL, logs, update_jobs, start_update
 import scheduler
 import disktool_core
 from addon_loader import AddonManager
@@ -19,10 +22,67 @@ try:
 except ImportError:
     pass  # python-dotenv is optional
 
+# Use orjson for faster JSON parsing if available
+try:
+    import orjson
+except ImportError:
+    orjson = None  # orjson is optional
+
 app = Flask(__name__, template_folder="templates", static_folder="static")
 
-# Security: Use environment variables for credentials, generate secure secret key
-app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+# Keep compiled templates across restarts (per-user cache directory in the system temp dir).
+# Templates are only re-checked on disk in debug mode or with TEMPLATES_AUTO_RELOAD set.
+app.jinja_env.bytecode_cache = jinja2.FileSystemBytecodeCache()
+
+# Generated secret key, kept next to the app so sessions survive restarts
+# and are shared by all worker processes
+SECRET_KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".secret_key")
+
+SECRET_KEY_BYTES = 32
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """
+    Return the session secret key: SECRET_KEY from the environment if set,
+    otherwise the key stored in path, generating it on first start.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    if not os.path.exists(path):
+        # Write the new key to a private file and link it into place; when several
+        # workers start at once, the first link wins and everyone reads that key
+        key = secrets.token_bytes(SECRET_KEY_BYTES)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # No hard links on this filesystem (e.g. vfat, some SMB/FUSE mounts):
+            # create the file exclusively instead, the first creator wins
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                pass
+            else:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(key)
+        finally:
+            os.remove(tmp_path)
+    # A key created exclusively by another worker may not be written completely yet
+    for _ in range(50):
+        with open(path, "rb") as f:
+            key = f.read()
+        if len(key) >= SECRET_KEY_BYTES:
+            break
+        time.sleep(0.1)
+    return key
+
+# Security: Use environment variables for credentials, keep a stable secret key
+app.secret_key = load_secret_key()
 
 USERNAME = os.environ.get('DASHBOARD_USERNAME', 'admin')
 PASSWORD = os.environ.get('DASHBOARD_PASSWORD', 'password')
@@ -36,10 +96,26 @@ addon_mgr = AddonManager(app, disktool_core)
 app.addon_mgr = addon_mgr
 addon_mgr.load_addons()
 
-# Template function for HTML extensions
+# Compile the plugin page templates now, so the first request for each plugin doesn't pay for it.
+# Plugins are only loaded at startup, so the names of their pages are collected here once.
+_PLUGIN_TEMPLATES = set()
+for _tpl in sorted(os.listdir(os.path.join(app.root_path, app.template_folder, "addons"))):
+    if _tpl.endswith(".html"):
+        try:
+            app.jinja_env.get_template(f"addons/{_tpl}")
+            _PLUGIN_TEMPLATES.add(_tpl[:-5])
+        except jinja2.TemplateError as e:
+            print(f"WARNING: Plugin template addons/{_tpl} failed to compile: {e}")
+
+# Template functions for HTML extensions; built once and shared by every render
+_HOOK_CONTEXT = dict(
+    hook=addon_mgr.render_hooks,
+    device_buttons=addon_mgr.render_device_buttons
+)
+
 @app.context_processor
 def inject_hooks():
-    return dict(hook=lambda name, *args, **kwargs: addon_mgr.render_hooks(name, *args, **kwargs))
+    return _HOOK_CONTEXT
 
 # Template function for user context
 @app.context_processor
@@ -50,7 +126,7 @@ def inject_user_context():
     is_admin = False
     
     if user_id:
-        user_roles = user_management.get_user_role_names(user_id)
+        user_roles = user_management.get_cached_user_role_names(user_id)
         is_admin = 'admin' in user_roles
     
     return dict(
@@ -60,25 +136,53 @@ def inject_user_context():
         localhost_identifiers=LOCALHOST_IDENTIFIERS
     )
 
+# (checked_at, notification); re-read from the version file at most every NOTIFICATION_CACHE_TTL seconds
+NOTIFICATION_CACHE_TTL = 60
+_notification_cache = (float("-inf"), None)
+
+def invalidate_notification_cache():
+    """Make the next page render re-read the update notification."""
+    global _notification_cache
+    _notification_cache = (float("-inf"), None)
+
 # Template function for version update notifications
 @app.context_processor
 def inject_version_notification():
     """Make version update notifications available in all templates."""
-    notification = version_manager.get_update_notification()
+    global _notification_cache
+    checked_at, notification = _notification_cache
+    now = time.monotonic()
+    if now - checked_at > NOTIFICATION_CACHE_TTL:
+        notification = version_manager.get_update_notification()
+        _notification_cache = (now, notification)
     return dict(update_notification=notification)
 
-logs = {}
+# Host updates run through updater.start_update on updater.UPDATE_POOL; extra requests
+# queue instead of spawning threads. The update logs and jobs live in updater.logs and
+# updater.update_jobs, shared with the scheduled updates.
+# The most recent dashboard self-update; only one runs at a time
+_self_update = {"id": None, "future": None}
+_SELF_UPDATE_LOCK = threading.Lock()
 
-def current_user_has_role(*roles):
-    """Check if the current logged-in user has any of the specified roles."""
-    user_id = session.get("user_id")
-    if not user_id:
-        return False
-    user_roles = user_management.get_user_role_names(user_id)
-    # Admin has access to everything
-    if 'admin' in user_roles:
-        return True
-    return any(role in user_roles for role in roles)
+def start_self_update(preserve_configs):
+    """
+    Run version_manager.perform_self_update() on UPDATE_POOL and return its job id,
+    or None if a self-update is still running.
+    """
+    with _SELF_UPDATE_LOCK:
+        job = _self_update["future"]
+        if job is not None and not job.done():
+            return None
+        future = UPDATE_POOL.submit(version_manager.perform_self_update, preserve_configs)
+        future.add_done_callback(lambda f: invalidate_notification_cache())
+        _self_update.update(id=secrets.token_hex(8), future=future)
+        return _self_update["id"]
+
+# Shared by all dashboard requests for the per-host online probes
+_PROBE_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="probe")
+
+# Role checks share the per-request role cache kept on flask.g
+current_user_has_role = user_management.current_user_has_role
 
 def is_online(host, user):
     # Check if this is localhost
@@ -86,53 +190,167 @@ def is_online(host, user):
         # For localhost, just return True (we're always online to ourselves)
         return True
     
+    # A plain TCP connect to the SSH port is enough for a liveness check;
+    # no key exchange or authentication is needed to answer online/offline
     try:
-        ssh = paramiko.SSHClient()
-        # Security Note: AutoAddPolicy accepts any host key, making this vulnerable to MITM attacks.
-        # For production, use WarningPolicy or maintain a known_hosts file.
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(host, username=user, timeout=3)
-        ssh.close()
-        return True
-    except:
+        with socket.create_connection((host, 22), timeout=1.5):
+            return True
+    except OSError:
         return False
 
+# Last probed (online, checked_at), keyed by (host, user) so edited hosts are probed again
+_host_status = {}
+_HOST_STATUS_LOCK = threading.Lock()
+# Seconds between background refreshes of the host status
+HOST_STATUS_INTERVAL = 15
+
+def probe_hosts(hosts):
+    """Probe the given hosts concurrently, store the results and return {name: online}"""
+    # Entries pointing at the same host and user share one probe
+    keys = {name: (h["host"], h["user"]) for name, h in hosts.items()}
+    unique = list(dict.fromkeys(keys.values()))
+    results = dict(zip(unique, _PROBE_POOL.map(lambda key: is_online(*key), unique)))
+    now = time.monotonic()
+    with _HOST_STATUS_LOCK:
+        _host_status.update((key, (online, now)) for key, online in results.items())
+    return {name: results[key] for name, key in keys.items()}
+
+def get_host_status(hosts):
+    """
+    Return {name: online} from the background-refreshed status.
+    Hosts that have not been probed yet, or whose status is out of date
+    because the worker is not running, are probed now.
+    """
+    oldest = time.monotonic() - 2 * HOST_STATUS_INTERVAL
+    with _HOST_STATUS_LOCK:
+        entries = {name: _host_status.get((h["host"], h["user"])) for name, h in hosts.items()}
+    status = {name: entry[0] for name, entry in entries.items() if entry and entry[1] >= oldest}
+    missing = {name: h for name, h in hosts.items() if name not in status}
+    if missing:
+        status.update(probe_hosts(missing))
+    return status
+
+def refresh_host_status():
+    """Scheduled every HOST_STATUS_INTERVAL seconds to keep the host status fresh for the dashboard"""
+    try:
+        hosts = load_hosts()
+        probe_hosts(hosts)
+        # Forget hosts that were removed or edited
+        current = {(h["host"], h["user"]) for h in hosts.values()}
+        with _HOST_STATUS_LOCK:
+            for key in [key for key in _host_status if key not in current]:
+                del _host_status[key]
+    except Exception as e:
+        print(f"Error refreshing host status: {e}")
+
+# Parsed JSON files keyed by path, stored as (st_mtime_ns, data)
+_JSON_CACHE = {}
+# Files at least this large are memory-mapped instead of read when orjson is available
+_JSON_MMAP_MIN_SIZE = 64 * 1024
+
+def _load_json(path):
+    """
+    Load a JSON file, reusing the parsed data until the file's mtime changes.
+    The returned object is shared between callers; save changes back to disk
+    after modifying it.
+    """
+    st = os.stat(path)
+    mtime = st.st_mtime_ns
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        if orjson and st.st_size >= _JSON_MMAP_MIN_SIZE:
+            # orjson parses straight from the mapped file, skipping the read buffer copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = orjson.loads(memoryview(mm))
+        else:
+            raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+    _JSON_CACHE[path] = (mtime, data)
+    return data
+
 def load_hosts():
+    """
+    Return the configured hosts from the cached hosts.json.
+    Each call gets its own copy (host entries are flat dicts), so routes can
+    modify it before save_hosts() without affecting concurrent requests.
+    """
     try:
-        with open("hosts.json", "r") as f:
-            return json.load(f)
+        hosts = _load_json("hosts.json")
     except Exception:
         return {}
+    return {name: dict(h) for name, h in hosts.items()}
+
+def _get_host(name):
+    """Return (hosts, host entry); the entry is None when the host is not configured."""
+    hosts = load_hosts()
+    return hosts, hosts.get(name)
+
+def load_history():
+    try:
+        return _load_json("history.json")
+    except Exception:
+        return []
 
 def save_hosts(hosts):
-    with open("hosts.json", "w") as f:
-        json.dump(hosts, f, indent=2)
+    if orjson:
+        data = orjson.dumps(hosts, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(hosts, indent=2).encode("utf-8")
+    try:
+        with open("hosts.json", "rb") as f:
+            unchanged = f.read() == data
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        # Write to a temporary file and rename it, so a crash never leaves a truncated hosts.json
+        with open("hosts.json.tmp", "wb") as f:
+            f.write(data)
+        os.replace("hosts.json.tmp", "hosts.json")
+    _JSON_CACHE["hosts.json"] = (os.stat("hosts.json").st_mtime_ns, hosts)
+
+# Local public key, read (or generated) once per process
+_public_key = None
+_public_key_lock = threading.Lock()
 
 def get_local_public_key():
     """
     Return the local public key string. Generate a new keypair if needed.
+    The key is read once per process; restart the dashboard after replacing
+    it on disk.
     """
+    global _public_key
+    if _public_key is not None:
+        return _public_key
+    
     ssh_dir = os.path.expanduser("~/.ssh")
     pub_path = os.path.join(ssh_dir, "id_rsa.pub")
     priv_path = os.path.join(ssh_dir, "id_rsa")
 
-    try:
-        if os.path.exists(pub_path):
-            with open(pub_path, "r") as f:
-                return f.read().strip()
-        # generate new keypair
-        os.makedirs(ssh_dir, exist_ok=True)
-        key = paramiko.RSAKey.generate(2048)
-        # write private key
-        key.write_private_key_file(priv_path)
-        with open(pub_path, "w") as f:
-            f.write(f"{key.get_name()} {key.get_base64()}\n")
-        os.chmod(priv_path, 0o600)
-        os.chmod(pub_path, 0o644)
-        with open(pub_path, "r") as f:
-            return f.read().strip()
-    except Exception as e:
-        raise RuntimeError(f"Failed to obtain or generate local SSH key: {e}")
+    # The lock keeps two concurrent first calls from both generating a keypair
+    with _public_key_lock:
+        if _public_key is not None:
+            return _public_key
+        try:
+            if os.path.exists(pub_path):
+                with open(pub_path, "r") as f:
+                    _public_key = f.read().strip()
+                return _public_key
+            # generate new keypair
+            os.makedirs(ssh_dir, exist_ok=True)
+            key = paramiko.RSAKey.generate(2048)
+            # write private key
+            key.write_private_key_file(priv_path)
+            pubkey = f"{key.get_name()} {key.get_base64()}"
+            with open(pub_path, "w") as f:
+                f.write(f"{pubkey}\n")
+            os.chmod(priv_path, 0o600)
+            os.chmod(pub_path, 0o644)
+            _public_key = pubkey
+            return _public_key
+        except Exception as e:
+            raise RuntimeError(f"Failed to obtain or generate local SSH key: {e}")
 
 def login_required(f):
     """Decorator to require login - uses new user management system."""
@@ -165,7 +383,10 @@ def login():
             return redirect(next_url)
         
         # Fallback to environment variable authentication for backward compatibility
-        if username == USERNAME and password == PASSWORD:
+        # Compare in constant time; evaluate both so timing doesn't reveal which one matched
+        user_ok = hmac.compare_digest((username or "").encode("utf-8"), USERNAME.encode("utf-8"))
+        pass_ok = hmac.compare_digest((password or "").encode("utf-8"), PASSWORD.encode("utf-8"))
+        if user_ok & pass_ok:
             session["login"] = True
             session["username"] = username
             flash('Logged in successfully (legacy mode)')
@@ -193,8 +414,9 @@ def index():
 def dashboard():
     """Linux Update Dashboard"""
     hosts = load_hosts()
-    history = json.load(open("history.json"))
-    status = {n: is_online(h["host"], h["user"]) for n, h in hosts.items()}
+    history = load_history()
+    # Status is refreshed in the background; only hosts not probed yet are probed here
+    status = get_host_status(hosts)
     
     # Load update settings for display
     settings = scheduler.load_update_settings()
@@ -217,18 +439,44 @@ def update(name):
         flash('You need operator or admin role to perform system updates.')
         return redirect(url_for('dashboard'))
     
-    hosts = load_hosts()
-    logs[name] = []
-    threading.Thread(
-        target=run_update,
-        args=(hosts[name]["host"], hosts[name]["user"], name, logs[name])
-    ).start()
+    _, target = _get_host(name)
+    if target is None:
+        flash(f'Host {name} not found')
+        return redirect(url_for('dashboard'))
+    
+    if not start_update(name, target):
+        flash(f'An update for {name} is already in progress')
     return redirect(f"/progress/{name}")
 
 @app.route("/progress/<name>")
 @login_required
 def progress(name):
-    return render_template("progress.html", log=logs.get(name, []))
+    job = update_jobs.get(name)
+    buf = logs.get(name)
+    log, offset = buf.snapshot() if buf else ([], 0)
+    return render_template("progress.html", name=name, log=log, offset=offset,
+                           running=job is not None and not job.done())
+
+@app.route("/progress/<name>/tail")
+@login_required
+def progress_tail(name):
+    """JSON with the log lines after the given offset, polled by the progress page"""
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except ValueError:
+        offset = 0
+    job = update_jobs.get(name)
+    # Check before reading the log, so lines written just before the job ended are still sent
+    running = job is not None and not job.done()
+    buf = logs.get(name)
+    lines, total = buf.since(offset) if buf else ([], 0)
+    # An offset past the end means a new update replaced the log; start over from its first line
+    reset = offset > total
+    if reset:
+        lines, total = buf.since(0) if buf else ([], 0)
+    payload = {"seq": total, "lines": [str(line) for line in lines], "reset": reset, "running": running}
+    body = orjson.dumps(payload) if orjson else json.dumps(payload)
+    return Response(body, mimetype="application/json", headers={"Cache-Control": "no-store"})
 
 # Update settings routes
 @app.route("/update_settings", methods=["GET", "POST"])
@@ -335,6 +583,7 @@ def check_dashboard_version():
         return redirect(url_for('index'))
     
     version_data = version_manager.check_for_updates()
+    invalidate_notification_cache()
     
     if version_data.get("update_available"):
         flash(f'Dashboard update available: {version_data.get("update_description")}')
@@ -348,6 +597,7 @@ def check_dashboard_version():
 def dismiss_dashboard_notification():
     """Dismiss the current update notification"""
     version_manager.dismiss_notification()
+    invalidate_notification_cache()
     return redirect(request.referrer or url_for('index'))
 
 @app.route("/dashboard_version/update", methods=["GET", "POST"])
@@ -361,18 +611,35 @@ def update_dashboard():
     
     if request.method == "POST":
         preserve_configs = request.form.get("preserve_configs", "yes") == "yes"
-        success, message = version_manager.perform_self_update(preserve_configs)
-        
-        if success:
-            flash(message, 'success')
-        else:
-            flash(message, 'error')
-        
-        return redirect(url_for('index'))
+        job_id = start_self_update(preserve_configs)
+        if job_id is None:
+            flash('A dashboard update is already in progress.')
+            job_id = _self_update["id"]
+        return redirect(url_for('update_dashboard', job=job_id))
     
-    # GET request - show confirmation page
+    # GET request - show confirmation page, or the progress of a started update
     version_data = version_manager.load_version_data()
-    return render_template("dashboard_update.html", version_data=version_data)
+    job_id = request.args.get("job")
+    if job_id != _self_update["id"]:
+        job_id = None
+    return render_template("dashboard_update.html", version_data=version_data, job_id=job_id)
+
+@app.route("/dashboard_version/status/<job_id>")
+@login_required
+def self_update_status(job_id):
+    """JSON state of a background dashboard update, polled by the update page"""
+    if session.get("user_id") and not current_user_has_role('admin'):
+        return jsonify({"error": "forbidden"}), 403
+    job = _self_update["future"] if job_id == _self_update["id"] else None
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    if not job.done():
+        return jsonify({"state": "running" if job.running() else "queued"})
+    try:
+        success, message = job.result()
+    except Exception as e:
+        success, message = False, f"Update failed: {e}"
+    return jsonify({"state": "done", "success": success, "message": message})
 
 @app.route("/update_repo/<name>")
 @login_required
@@ -383,16 +650,13 @@ def update_repo(name):
         flash('You need operator or admin role to perform system updates.')
         return redirect(url_for('dashboard'))
     
-    hosts = load_hosts()
-    if name not in hosts:
+    _, target = _get_host(name)
+    if target is None:
         flash(f'Host {name} not found')
         return redirect(url_for('dashboard'))
     
-    logs[name] = []
-    threading.Thread(
-        target=run_update,
-        args=(hosts[name]["host"], hosts[name]["user"], name, logs[name], True)
-    ).start()
+    if not start_update(name, target, repo_only=True):
+        flash(f'An update for {name} is already in progress')
     return redirect(f"/progress/{name}")
 
 # Host management routes
@@ -424,8 +688,8 @@ def manage_hosts():
 @app.route("/hosts/edit/<orig_name>", methods=["GET", "POST"])
 @login_required
 def edit_host(orig_name):
-    hosts = load_hosts()
-    if orig_name not in hosts:
+    hosts, data = _get_host(orig_name)
+    if data is None:
         return redirect("/hosts")
     if request.method == "POST":
         # Require operator or admin role to modify hosts
@@ -448,7 +712,7 @@ def edit_host(orig_name):
             save_hosts(hosts)
         return redirect("/hosts")
     # GET
-    return render_template("edit_host.html", name=orig_name, data=hosts[orig_name])
+    return render_template("edit_host.html", name=orig_name, data=data)
 
 # Delete host
 @app.route("/hosts/delete/<name>", methods=["POST"])
@@ -460,8 +724,7 @@ def delete_host(name):
         return redirect(url_for('manage_hosts'))
     
     hosts = load_hosts()
-    if name in hosts:
-        hosts.pop(name)
+    if hosts.pop(name, None) is not None:
         save_hosts(hosts)
     return redirect("/hosts")
 
@@ -474,12 +737,10 @@ def install_key(name):
         flash('You need operator or admin role to install SSH keys.')
         return redirect(url_for('manage_hosts'))
     
-    hosts = load_hosts()
-    if name not in hosts:
+    _, target = _get_host(name)
+    if target is None:
         return redirect("/hosts")
     
-    target = hosts[name]
-    
     # Check if this is localhost - no SSH key needed
     if is_localhost(target["host"]):
         flash('SSH key installation is not needed for localhost. Updates will run directly on the local system.')
@@ -495,48 +756,45 @@ def install_key(name):
             error = str(e)
             return render_template("install_key.html", name=name, error=error, success=False)
 
-        target = hosts[name]
+        ssh = paramiko.SSHClient()
+        # Security Note: AutoAddPolicy accepts any host key, making this vulnerable to MITM attacks.
+        # For production, use WarningPolicy or maintain a known_hosts file.
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         try:
-            ssh = paramiko.SSHClient()
-            # Security Note: AutoAddPolicy accepts any host key, making this vulnerable to MITM attacks.
-            # For production, use WarningPolicy or maintain a known_hosts file.
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             ssh.connect(target["host"], username=target["user"], password=password, timeout=10)
             
             # Security: Use SFTP to safely write the key file instead of shell commands
             try:
-                sftp = ssh.open_sftp()
-                # Create .ssh directory
-                try:
-                    sftp.stat('.ssh')
-                except IOError:
-                    sftp.mkdir('.ssh')
-                    sftp.chmod('.ssh', 0o700)
-                
-                # Read existing authorized_keys if present
-                auth_keys_path = '.ssh/authorized_keys'
-                try:
-                    with sftp.file(auth_keys_path, 'r') as f:
-                        existing_keys = f.read().decode('utf-8')
-                except IOError:
-                    existing_keys = ''
-                
-                # Append new key if not already present
-                if pubkey not in existing_keys:
-                    with sftp.file(auth_keys_path, 'a') as f:
-                        f.write(f'\n{pubkey}\n')
-                    sftp.chmod(auth_keys_path, 0o600)
-                    success = True
-                else:
-                    success = True  # Key already installed
+                with ssh.open_sftp() as sftp:
+                    # Create .ssh directory; mkdir fails if it already exists,
+                    # which saves a separate stat round trip
+                    try:
+                        sftp.mkdir('.ssh', 0o700)
+                        sftp.chmod('.ssh', 0o700)
+                    except IOError:
+                        pass
                     
-                sftp.close()
+                    # Read authorized_keys and append the key through a single handle;
+                    # 'a+' creates the file if it does not exist yet
+                    auth_keys_path = '.ssh/authorized_keys'
+                    with sftp.open(auth_keys_path, 'a+', bufsize=32768) as f:
+                        f.seek(0)
+                        existing_keys = f.read().decode('utf-8', errors='replace')
+                        added = pubkey not in existing_keys
+                        if added:
+                            f.seek(0, os.SEEK_END)
+                            prefix = '\n' if existing_keys and not existing_keys.endswith('\n') else ''
+                            f.write(f'{prefix}{pubkey}\n')
+                    if added:
+                        sftp.chmod(auth_keys_path, 0o600)
+                    success = True  # Installed now or already present
             except Exception as e:
                 error = f"SFTP error: {e}"
-            finally:
-                ssh.close()
         except Exception as e:
             error = f"Connection error: {e}"
+        finally:
+            # Also release the socket when connecting or authenticating fails
+            ssh.close()
     return render_template("install_key.html", name=name, error=error, success=success)
 
 # ARP-based IP change detection routes
@@ -549,12 +807,11 @@ def detect_mac(name):
         flash('You need operator or admin role to detect MAC addresses.')
         return redirect(url_for('manage_hosts'))
     
-    hosts = load_hosts()
-    if name not in hosts:
+    hosts, host_config = _get_host(name)
+    if host_config is None:
         flash(f'Host {name} not found')
         return redirect(url_for('manage_hosts'))
     
-    host_config = hosts[name]
     ip = host_config['host']
     
     # Check if this is localhost
@@ -569,7 +826,6 @@ def detect_mac(name):
         if mac:
             # Update host configuration with MAC address
             host_config['mac'] = mac
-            hosts[name] = host_config
             save_hosts(hosts)
             flash(f'MAC address detected and saved for {name}: {mac}')
         else:
@@ -597,9 +853,9 @@ def scan_ip_changes():
     changes = arp_tracker.detect_ip_changes(hosts, arp_mappings)
     
     if changes:
-        # Update host IPs
-        updated_hosts = arp_tracker.update_host_ips(hosts, changes)
-        save_hosts(updated_hosts)
+        # Update host IPs (in place)
+        arp_tracker.update_host_ips(hosts, changes)
+        save_hosts(hosts)
         
         # Create flash message with changes
         change_messages = []
@@ -627,7 +883,8 @@ def view_arp_table():
 @login_required
 def disks_index():
     """Disk management main page"""
-    disktool_core.sync_disks()
+    # lsblk/smartctl run in the background; the page shows the disks as stored by the last sync
+    disktool_core.refresh_disks_async()
     q = request.args.get('q','')
     disks = disktool_core.get_disk_list(q)
     return render_template('disks/index.html', disks=disks, auto=disktool_core.auto_enabled)
@@ -683,8 +940,8 @@ def smart_start_route(device, mode):
     if mode not in {'short','long'}:
         flash('Invalid SMART type')
         return redirect(url_for('disks_index'))
-    disktool_core.start_smart(device, mode)
-    flash(f'SMART {mode} started for {device}')
+    op_id = disktool_core.start_smart(device, mode)
+    flash(f'SMART {mode} task {op_id} started for {device}')
     return redirect(url_for('disks_index'))
 
 @app.route("/disks/smart/view/<device>")
@@ -706,7 +963,18 @@ def validate_route(device):
     except ValueError as e:
         flash(f'Invalid device name: {e}')
         return redirect(url_for('disks_index'))
-    blocks, bad = disktool_core.validate_blocks(device)
+    op_id = disktool_core.start_validate(device)
+    flash(f'Validation task {op_id} started for {device}')
+    return redirect(url_for('task_status', op_id=op_id))
+
+@app.route("/disks/validate/result/<int:op_id>")
+@login_required
+def view_validate(op_id):
+    result = disktool_core.get_validation(op_id)
+    if result is None:
+        flash(f'No validation result for task {op_id}')
+        return redirect(url_for('task_status', op_id=op_id))
+    device, blocks, bad = result
     return render_template('disks/validate.html', device=device, blocks=blocks, bad_blocks=bad)
 
 @app.route("/disks/history")
@@ -736,8 +1004,18 @@ def disk_dashboard():
 @app.route("/disks/export-smart")
 @login_required
 def export_smart():
-    csv_path = disktool_core.export_smart_data()
-    return send_file(csv_path, as_attachment=True)
+    # The ETag follows the SMART history, so unchanged data is answered with 304 without reading it again
+    version = disktool_core.smart_data_version()
+    if request.if_none_match.contains(version):
+        response = app.response_class(status=304)
+        response.set_etag(version)
+        return response
+    # Rows are streamed straight from the database, without writing a file first
+    response = Response(disktool_core.iter_smart_csv(), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=smart.csv",
+                                 "Cache-Control": "no-cache"})
+    response.set_etag(version)
+    return response
 
 @app.route("/disks/import-smart", methods=['GET','POST'])
 @login_required
@@ -759,7 +1037,35 @@ def import_smart():
 @login_required
 def task_status_api(op_id):
     status, progress = disktool_core.get_task_status(op_id)
-    return jsonify(status=status, progress=progress)
+    # One-shot status for scripts; the task page follows task_status_stream instead
+    payload = {"status": status, "progress": progress}
+    body = orjson.dumps(payload) if orjson else json.dumps(payload)
+    return Response(body, mimetype="application/json", headers={"Cache-Control": "no-store"})
+
+@app.route("/disks/task/stream/<int:op_id>")
+@login_required
+def task_status_stream(op_id):
+    """Server-Sent Events with the task's status and progress on every change, until it has finished"""
+    def generate():
+        version = disktool_core.op_version()
+        last = None
+        while True:
+            status, progress = disktool_core.get_task_status(op_id)
+            if (status, progress) != last:
+                last = (status, progress)
+                payload = {"status": status, "progress": progress}
+                body = orjson.dumps(payload).decode() if orjson else json.dumps(payload)
+                yield f"data: {body}\n\n"
+            if status not in disktool_core.ACTIVE_STATUSES:
+                return
+            # Sleep until any operation changes; the heartbeat lets dead connections be noticed
+            new_version = disktool_core.wait_op_changed(version, timeout=30)
+            if new_version == version:
+                yield ": ping\n\n"
+            version = new_version
+    
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/disks/task/status/<int:op_id>")
 @login_required
@@ -779,13 +1085,14 @@ def stop_task(op_id):
     flash(f'Task {op_id} stopped')
     return redirect(url_for('disk_history'))
 
+# Plugin names may only contain alphanumeric characters and underscores
+_PLUGIN_NAME_RE = re.compile(r'[a-zA-Z0-9_]+')
+
 @app.route("/disks/addons/<plugin>/<device>")
 @login_required
 def render_plugin_page(plugin, device):
     # Validate plugin name to prevent template injection
-    # Only allow alphanumeric characters and underscores
-    import re
-    if not re.match(r'^[a-zA-Z0-9_]+$', plugin):
+    if not _PLUGIN_NAME_RE.fullmatch(plugin):
         flash('Invalid plugin name')
         return redirect(url_for('disks_index'))
     
@@ -796,19 +1103,22 @@ def render_plugin_page(plugin, device):
         flash(f'Invalid device name: {e}')
         return redirect(url_for('disks_index'))
     
-    # Check if the plugin template exists
-    from pathlib import Path
-    template_path = Path(app.template_folder) / 'addons' / f'{plugin}.html'
-    if not template_path.exists():
+    # Check if the plugin has a page (collected at startup)
+    if plugin not in _PLUGIN_TEMPLATES:
         flash(f'Plugin {plugin} not found')
         return redirect(url_for('disks_index'))
     
-    # Special handling for remote_disk_plugin to pass remotes data
-    if plugin == 'remote_disk_plugin':
-        remotes = disktool_core.list_remotes()
-        return render_template(f'addons/{plugin}.html', device=device, remotes=remotes)
-    
-    return render_template(f'addons/{plugin}.html', device=device)
+    try:
+        # Special handling for remote_disk_plugin to pass remotes data
+        if plugin == 'remote_disk_plugin':
+            remotes = disktool_core.list_remotes()
+            return render_template(f'addons/{plugin}.html', device=device, remotes=remotes)
+        
+        return render_template(f'addons/{plugin}.html', device=device)
+    except jinja2.TemplateNotFound:
+        # The plugin was uninstalled since startup
+        flash(f'Plugin {plugin} not found')
+        return redirect(url_for('disks_index'))
 
 @app.route("/addons/<plugin>/<device>")
 @login_required
@@ -860,14 +1170,12 @@ def users_list():
         return redirect(url_for('index'))
     
     # Check if user is admin
-    if not user_management.user_has_role(user_id, 'admin'):
+    if not current_user_has_role('admin'):
         flash('Only administrators can manage users.')
         return redirect(url_for('index'))
     
     users = user_management.list_users()
-    roles_by_user = {}
-    for user in users:
-        roles_by_user[user['id']] = user_management.get_user_role_names(user['id'])
+    roles_by_user = user_management.get_role_names_by_user()
     
     return render_template('users/list.html', users=users, roles_by_user=roles_by_user)
 
@@ -880,7 +1188,7 @@ def users_add():
         flash('User management requires database authentication.')
         return redirect(url_for('index'))
     
-    if not user_management.user_has_role(user_id, 'admin'):
+    if not current_user_has_role('admin'):
         flash('Only administrators can manage users.')
         return redirect(url_for('index'))
     
@@ -913,7 +1221,7 @@ def users_edit(uid):
         flash('User management requires database authentication.')
         return redirect(url_for('index'))
     
-    if not user_management.user_has_role(user_id, 'admin'):
+    if not current_user_has_role('admin'):
         flash('Only administrators can manage users.')
         return redirect(url_for('index'))
     
@@ -963,7 +1271,7 @@ def users_delete(uid):
         flash('User management requires database authentication.')
         return redirect(url_for('index'))
     
-    if not user_management.user_has_role(user_id, 'admin'):
+    if not current_user_has_role('admin'):
         flash('Only administrators can manage users.')
         return redirect(url_for('index'))
     
@@ -1006,21 +1314,55 @@ def users_profile():
         flash('Profile updated successfully.')
         return redirect(url_for('users_profile'))
     
-    user_roles = user_management.get_user_role_names(user_id)
+    user_roles = sorted(user_management.get_cached_user_role_names(user_id))
     return render_template('users/profile.html', user=user, user_roles=user_roles)
 
 # Security: Add security headers
+_SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+)
+_HSTS_HEADER = 'max-age=31536000; includeSubDomains'
+
+# Set FORCE_HTTPS when the dashboard is only reachable over HTTPS (e.g. behind a TLS proxy),
+# so HSTS is sent without inspecting every request
+app.config['FORCE_HTTPS'] = os.environ.get('FORCE_HTTPS', 'False').lower() == 'true'
+
 @app.after_request
 def add_security_headers(response):
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
+    headers = response.headers
+    for name, value in _SECURITY_HEADERS:
+        headers.setdefault(name, value)
     # Only set HSTS header for HTTPS connections
-    if request.is_secure:
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+    if app.config['FORCE_HTTPS'] or request.is_secure:
+        headers.setdefault('Strict-Transport-Security', _HSTS_HEADER)
     return response
 
-if __name__ == "__main__":
+def version_check():
+    """Scheduled hourly; checks for dashboard updates at most once a day"""
+    try:
+        settings = scheduler.load_update_settings()
+        if settings.get("dashboard_update_notifications", True):
+            if version_manager.should_check_for_updates(check_interval_hours=24):
+                version_manager.check_for_updates()
+    except Exception as e:
+        print(f"Error checking for dashboard updates: {e}")
+
+_services_started = False
+_services_lock = threading.Lock()
+
+def init_services():
+    """
+    Initialize the databases and start the background workers (app.py and wsgi.py).
+    Runs once per process; later calls do nothing.
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+    
     # Initialize User Management database
     user_management.init_user_db()
     # Migrate environment variable user to database
@@ -1029,29 +1371,41 @@ if __name__ == "__main__":
     
     # Initialize Disk Tools database
     disktool_core.init_db()
-    # Start Disk Tools auto-mode worker
-    threading.Thread(target=disktool_core.auto_mode_worker, daemon=True).start()
+    # Periodic background work runs as jobs on the shared APScheduler thread pool
+    # instead of one sleeping thread per task; a job that is still running when
+    # it is due again is skipped, not started twice
+    now = datetime.now()
+    # Disk Tools auto mode: udev events when available, polling otherwise
+    if not disktool_core.start_auto_mode_monitor():
+        scheduler.scheduler.add_job(disktool_core.auto_mode_check, "interval",
+                                    seconds=disktool_core.AUTO_MODE_INTERVAL,
+                                    id="disk_auto_mode", replace_existing=True)
+    # Keep the dashboard's host online status fresh
+    scheduler.scheduler.add_job(refresh_host_status, "interval", seconds=HOST_STATUS_INTERVAL,
+                                next_run_time=now, id="host_status", replace_existing=True)
+    # Check for dashboard version updates
+    scheduler.scheduler.add_job(version_check, "interval", hours=1,
+                                next_run_time=now, id="version_check", replace_existing=True)
     
     # Configure automatic update scheduler
     scheduler.configure_scheduler()
-    
-    # Background task to check for dashboard version updates
-    def version_check_worker():
-        """Background worker to periodically check for dashboard updates"""
-        import time
-        while True:
-            try:
-                settings = scheduler.load_update_settings()
-                if settings.get("dashboard_update_notifications", True):
-                    if version_manager.should_check_for_updates(check_interval_hours=24):
-                        version_manager.check_for_updates()
-            except Exception as e:
-                print(f"Error checking for dashboard updates: {e}")
-            # Sleep for 1 hour before checking again
-            time.sleep(3600)
-    
-    threading.Thread(target=version_check_worker, daemon=True).start()
+    scheduler.start_scheduler()
+
+if __name__ == "__main__":
+    init_services()
     
     # Security: Disable debug mode in production
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    app.run(host="0.0.0.0", port=5000, debug=debug_mode)
+    
+    # Serve with waitress if installed (multi-threaded, also runs on Windows);
+    # use the Flask development server in debug mode or with --dev
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None  # waitress is optional
+    
+    if serve and not debug_mode and "--dev" not in sys.argv:
+        print("INFO: Serving with waitress on http://0.0.0.0:5000")
+        serve(app, host="0.0.0.0", port=5000, threads=16)
+    else:
+        app.run(host="0.0.0.0", port=5000, debug=debug_mode, threaded=True)
@@ -8,15 +8,55 @@ This module provides functionality to:
 - Automatically update host configurations when IPs change
 """
 
+import os
+import shutil
 import subprocess
 import re
+import threading
+import time
 import json
 import logging
-import platform
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+from constants import is_windows
+
 logger = logging.getLogger(__name__)
 
+_IS_WINDOWS = is_windows()
+
+# Number of concurrent pings when sweeping a /24 network
+SCAN_WORKERS = 64
+
+# Tools that sweep a whole network in one process, preferred over one ping per address
+_FPING = shutil.which('fping')
+_NMAP = shutil.which('nmap')
+
+# Parsed ARP table is reused for this many seconds, e.g. by several lookups in one request
+ARP_CACHE_TTL = 1.0
+# (read_at, MAC-to-IP mappings)
+_arp_cache = (float('-inf'), {})
+_arp_lock = threading.Lock()
+
+# Serializes in-place IP updates of a shared hosts dictionary
+_hosts_update_lock = threading.Lock()
+
+# Kernel ARP table on Linux
+PROC_NET_ARP = '/proc/net/arp'
+
+# Patterns used by the validators and ARP table parsers, compiled once
+_IPV4_RE = re.compile(r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$')
+_NETWORK_PREFIX_RE = re.compile(r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})$')
+# Windows 'arp -a': 192.168.1.10        00-11-22-33-44-55     dynamic
+_WINDOWS_ARP_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)\s+([\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2})')
+# 'ip neigh': 192.168.1.10 dev eth0 lladdr 00:11:22:33:44:55 REACHABLE
+_IP_NEIGH_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)\s+.*\s+lladdr\s+([\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2})')
+# 'arp -n': 192.168.1.10    ether   00:11:22:33:44:55   C     eth0
+_ARP_N_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)\s+\S+\s+([\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2})')
+_MAC_SEPARATOR_RE = re.compile(r'[:-]')
+_MAC_HEX_RE = re.compile(r'^[0-9A-F]{12}$')
+
 
 def validate_ip_address(ip: str) -> bool:
     """
@@ -28,8 +68,7 @@ def validate_ip_address(ip: str) -> bool:
     Returns:
         bool: True if valid IPv4 address, False otherwise
     """
-    pattern = r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$'
-    match = re.match(pattern, ip)
+    match = _IPV4_RE.match(ip)
     
     if not match:
         return False
@@ -52,8 +91,7 @@ def validate_network_prefix(prefix: str) -> bool:
     Returns:
         bool: True if valid network prefix, False otherwise
     """
-    pattern = r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})$'
-    match = re.match(pattern, prefix)
+    match = _NETWORK_PREFIX_RE.match(prefix)
     
     if not match:
         return False
@@ -66,19 +104,63 @@ def validate_network_prefix(prefix: str) -> bool:
     return True
 
 
+def _read_proc_net_arp(path: str = PROC_NET_ARP) -> Dict[str, str]:
+    """
+    Parse the Linux kernel ARP table.
+    
+    Format: IP address   HW type   Flags   HW address          Mask   Device
+            192.168.1.10 0x1       0x2     00:11:22:33:44:55   *      eth0
+    
+    Returns:
+        dict: Dictionary mapping MAC addresses to IP addresses
+    """
+    arp_mappings = {}
+    with open(path) as f:
+        next(f, None)  # header line
+        for line in f:
+            parts = line.split()
+            if len(parts) < 4:
+                continue
+            ip, flags, mac = parts[0], parts[2], parts[3]
+            # Incomplete entries (flags 0x0) have no usable hardware address
+            if flags == '0x0' or mac == '00:00:00:00:00:00':
+                continue
+            arp_mappings[mac.upper()] = ip
+    return arp_mappings
+
+
 def get_arp_table() -> Dict[str, str]:
     """
     Retrieve the system ARP table and return MAC-to-IP mappings.
     
+    The table is read at most once per ARP_CACHE_TTL seconds; pinging a host
+    or sweeping a network invalidates the cached copy.
+    
     Returns:
         dict: Dictionary mapping MAC addresses to IP addresses
               Example: {'00:11:22:33:44:55': '192.168.1.10'}
     """
+    global _arp_cache
+    with _arp_lock:
+        read_at, arp_mappings = _arp_cache
+        if time.monotonic() - read_at >= ARP_CACHE_TTL:
+            arp_mappings = _read_arp_table()
+            _arp_cache = (time.monotonic(), arp_mappings)
+    return dict(arp_mappings)
+
+
+def invalidate_arp_cache() -> None:
+    """Make the next get_arp_table() call read the ARP table again."""
+    global _arp_cache
+    with _arp_lock:
+        _arp_cache = (float('-inf'), {})
+
+
+def _read_arp_table() -> Dict[str, str]:
+    """Read the ARP table from the system (see get_arp_table)."""
     arp_mappings = {}
-    system_platform = platform.system().lower()
-    
     try:
-        if system_platform == 'windows':
+        if _IS_WINDOWS:
             # Windows: Use 'arp -a' command
             result = subprocess.run(['arp', '-a'], capture_output=True, text=True, timeout=10)
             
@@ -94,13 +176,16 @@ def get_arp_table() -> Dict[str, str]:
             #         192.168.1.10        00-11-22-33-44-55     dynamic
             for line in output.split('\n'):
                 # Match IP and MAC address patterns
-                match = re.search(r'(\d+\.\d+\.\d+\.\d+)\s+([\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2}[-:][\da-fA-F]{2})', line)
+                match = _WINDOWS_ARP_RE.search(line)
                 if match:
                     ip = match.group(1)
                     mac = match.group(2).replace('-', ':').upper()
                     arp_mappings[mac] = ip
+        elif os.path.exists(PROC_NET_ARP):
+            # Linux: read the kernel's ARP table directly instead of running a command
+            arp_mappings.update(_read_proc_net_arp(PROC_NET_ARP))
         else:
-            # Linux/Unix: Use 'arp -n' or 'ip neigh' command
+            # Other Unix: Use 'arp -n' or 'ip neigh' command
             try:
                 # Try 'ip neigh' first (more modern)
                 result = subprocess.run(['ip', 'neigh'], capture_output=True, text=True, timeout=10)
@@ -116,7 +201,7 @@ def get_arp_table() -> Dict[str, str]:
                 # Parse 'ip neigh' output
                 # Format: 192.168.1.10 dev eth0 lladdr 00:11:22:33:44:55 REACHABLE
                 for line in output.split('\n'):
-                    match = re.search(r'(\d+\.\d+\.\d+\.\d+)\s+.*\s+lladdr\s+([\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2})', line)
+                    match = _IP_NEIGH_RE.search(line)
                     if match:
                         ip = match.group(1)
                         mac = match.group(2).upper()
@@ -136,7 +221,7 @@ def get_arp_table() -> Dict[str, str]:
                 # Format: Address    HWtype  HWaddress           Flags Mask   Iface
                 #         192.168.1.10 ether   00:11:22:33:44:55   C            eth0
                 for line in output.split('\n'):
-                    match = re.search(r'(\d+\.\d+\.\d+\.\d+)\s+\S+\s+([\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2}:[\da-fA-F]{2})', line)
+                    match = _ARP_N_RE.search(line)
                     if match:
                         ip = match.group(1)
                         mac = match.group(2).upper()
@@ -150,9 +235,11 @@ def get_arp_table() -> Dict[str, str]:
     return arp_mappings
 
 
+@lru_cache(maxsize=1024)
 def normalize_mac_address(mac: str) -> str:
     """
     Normalize a MAC address to a consistent format (uppercase, colon-separated).
+    Results are cached, since the same configured MACs are checked on every scan.
     
     Args:
         mac: MAC address in various formats (e.g., '00-11-22-33-44-55', '00:11:22:33:44:55')
@@ -161,10 +248,10 @@ def normalize_mac_address(mac: str) -> str:
         str: Normalized MAC address (e.g., '00:11:22:33:44:55')
     """
     # Remove any separators and convert to uppercase
-    mac_clean = re.sub(r'[:-]', '', mac).upper()
+    mac_clean = _MAC_SEPARATOR_RE.sub('', mac).upper()
     
     # Validate MAC address format (should be 12 hex characters)
-    if not re.match(r'^[0-9A-F]{12}$', mac_clean):
+    if not _MAC_HEX_RE.match(mac_clean):
         raise ValueError(f"Invalid MAC address format: {mac}")
     
     # Format as colon-separated pairs
@@ -195,8 +282,8 @@ def detect_ip_changes(hosts: Dict[str, Dict], arp_mappings: Dict[str, str]) -> L
             mac = normalize_mac_address(host_config['mac'])
             
             # Check if this MAC address is in the ARP table
-            if mac in arp_mappings:
-                current_ip = arp_mappings[mac]
+            current_ip = arp_mappings.get(mac)
+            if current_ip is not None:
                 configured_ip = host_config['host']
                 
                 # Check if the IP has changed
@@ -215,21 +302,28 @@ def update_host_ips(hosts: Dict[str, Dict], changes: List[Tuple[str, str, str]])
     """
     Update host IP addresses based on detected changes.
     
+    The hosts dictionary is updated in place and returned; callers that need
+    the previous state must copy it first (app.load_hosts() already returns
+    a private copy per call).
+    
     Args:
         hosts: Dictionary of host configurations
         changes: List of tuples (hostname, old_ip, new_ip)
     
     Returns:
-        dict: Updated hosts dictionary
+        dict: The same hosts dictionary, with the new IPs applied
     """
-    updated_hosts = hosts.copy()
+    if not changes:
+        return hosts
     
-    for hostname, old_ip, new_ip in changes:
-        if hostname in updated_hosts:
-            updated_hosts[hostname]['host'] = new_ip
-            logger.info(f"Updated IP for {hostname}: {old_ip} -> {new_ip}")
+    with _hosts_update_lock:
+        for hostname, old_ip, new_ip in changes:
+            host_config = hosts.get(hostname)
+            if host_config is not None:
+                host_config['host'] = new_ip
+                logger.info(f"Updated IP for {hostname}: {old_ip} -> {new_ip}")
     
-    return updated_hosts
+    return hosts
 
 
 def get_mac_address_for_ip(ip: str) -> Optional[str]:
@@ -267,10 +361,8 @@ def ping_host(ip: str) -> bool:
         logger.warning(f"Invalid IP address format: {ip}")
         return False
     
-    system_platform = platform.system().lower()
-    
     try:
-        if system_platform == 'windows':
+        if _IS_WINDOWS:
             # Windows: ping -n 1
             result = subprocess.run(['ping', '-n', '1', '-w', '1000', ip], 
                                     capture_output=True, timeout=5)
@@ -284,6 +376,31 @@ def ping_host(ip: str) -> bool:
     except (subprocess.TimeoutExpired, Exception) as e:
         logger.debug(f"Ping failed for {ip}: {e}")
         return False
+    finally:
+        # The ping may have added or refreshed an ARP entry
+        invalidate_arp_cache()
+
+
+def _sweep_network(network_prefix: str) -> bool:
+    """
+    Probe a validated /24 network with fping or nmap, if one is installed.
+    
+    Returns:
+        bool: True if the sweep ran, False if no tool is available or it failed
+    """
+    if _FPING:
+        cmd = [_FPING, '-a', '-q', '-r', '0', '-g', f"{network_prefix}.1", f"{network_prefix}.254"]
+    elif _NMAP:
+        cmd = [_NMAP, '-sn', '-n', f"{network_prefix}.0/24"]
+    else:
+        return False
+    try:
+        # fping exits with 1 when some hosts are unreachable, which is expected here
+        subprocess.run(cmd, capture_output=True, timeout=60)
+        return True
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.debug(f"Network sweep with {cmd[0]} failed: {e}")
+        return False
 
 
 def scan_network_for_mac(mac: str, network_prefix: str = "192.168.1") -> Optional[str]:
@@ -304,10 +421,13 @@ def scan_network_for_mac(mac: str, network_prefix: str = "192.168.1") -> Optiona
     
     logger.info(f"Scanning network {network_prefix}.0/24 for MAC {mac}")
     
-    # Ping all hosts in the range to populate ARP table
-    for i in range(1, 255):
-        ip = f"{network_prefix}.{i}"
-        ping_host(ip)
+    # Ping all hosts in the range to populate ARP table; a sweep tool probes the
+    # whole range from one process, otherwise the pings run in parallel threads
+    if not _sweep_network(network_prefix):
+        ips = [f"{network_prefix}.{i}" for i in range(1, 255)]
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            list(executor.map(ping_host, ips))
+    invalidate_arp_cache()
     
     # Check ARP table for the MAC address
     arp_mappings = get_arp_table()
@@ -2,19 +2,23 @@
 
 import platform
 
-# Localhost detection
-LOCALHOST_IDENTIFIERS = ['localhost', '127.0.0.1', '::1', '0.0.0.0']
+# Localhost detection (lowercase, checked by set membership)
+LOCALHOST_IDENTIFIERS = frozenset({'localhost', '127.0.0.1', '::1', '0.0.0.0'})
 
 def is_localhost(host):
     """Check if the given host is localhost"""
     if not host:
         return False
-    return host.lower() in LOCALHOST_IDENTIFIERS
+    # Exact matches skip the lower() copy
+    return host in LOCALHOST_IDENTIFIERS or host.lower() in LOCALHOST_IDENTIFIERS
+
+# The platform cannot change while running, so it is detected once
+_PLATFORM = platform.system().lower()
 
 def is_windows():
     """Check if the current platform is Windows"""
-    return platform.system().lower() == 'windows'
+    return _PLATFORM == 'windows'
 
 def get_platform():
     """Get the current platform (linux, windows, darwin, etc.)"""
-    return platform.system().lower()
+    return _PLATFORM
@@ -1,13 +1,36 @@
-import os, json, csv, sqlite3, subprocess, threading, re
+import os, io, json, csv, mmap, sqlite3, subprocess, threading, re, time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import pyudev
+except ImportError:
+    pyudev = None  # pyudev ist optional; ohne wird der Auto-Modus gepollt
+
 # Globale Pfade und Variablen
 DB_FILE = Path(__file__).with_suffix('.db')
 UPLOAD_DIR = Path(__file__).parent / 'uploads'
 UPLOAD_DIR.mkdir(exist_ok=True)
 auto_enabled = False
 AUTO_SKIP_DEVICE = 'mmcblk0'  # z.B. Systemlaufwerk, das bei Auto-Sync ignoriert wird
+SYNC_MIN_INTERVAL = 5  # Sekunden, in denen ein erneuter Sync über sync_disks_if_stale entfällt
+_last_sync = 0.0
+_sync_lock = threading.Lock()
+# Ein einzelner Hintergrund-Thread für Syncs, die von Seitenaufrufen angestoßen werden
+_sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='disk-sync')
+_sync_future = None
+_sync_future_lock = threading.Lock()
+
+# Einmal kompilierte Muster für Gerätenamen, Befehle und SMART-Ausgaben
+_DEVICE_NAME_RE = re.compile(r'^[a-zA-Z0-9_-]{1,255}$')
+_EXECUTABLE_ABS_RE = re.compile(r'^/[a-zA-Z0-9/_-]+$')
+_EXECUTABLE_REL_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+# Rohwert der Attributzeile: ID NAME FLAG VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
+_TEMPERATURE_RE = re.compile(r'Temperature_Celsius(?:[ \t]+\S+){7}[ \t]+(\d+)')
+_DEVICE_BASE_RE = re.compile(r'([a-zA-Z]+)')
+# Oktal-Escapes in /proc/mounts, z.B. \040 (Leerzeichen), \011 (Tab), \134 (Backslash)
+_MOUNT_ESCAPE_RE = re.compile(r'\\([0-7]{3})')
 
 def sanitize_device_name(device):
     """
@@ -18,19 +41,55 @@ def sanitize_device_name(device):
     if not device or not isinstance(device, str):
         raise ValueError("Invalid device name")
     # Only allow safe characters for device names with reasonable length limit
-    if not re.match(r'^[a-zA-Z0-9_-]{1,255}$', device):
+    if not _DEVICE_NAME_RE.match(device):
         raise ValueError(f"Invalid device name: {device}")
     return device
 
-def get_db():
-    """Stellt eine DB-Verbindung her und liefert das Connection-Objekt zurück."""
-    conn = sqlite3.connect(DB_FILE)
+# Eine offene Verbindung pro Thread, statt bei jedem Aufruf neu zu verbinden
+_db_local = threading.local()
+
+class _Connection(sqlite3.Connection):
+    """Verbindung, bei der verschachtelte `with`-Blöcke eine gemeinsame Transaktion bilden:
+       Commit bzw. Rollback erfolgt erst beim Verlassen des äußersten Blocks."""
+    _depth = 0
+
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth:
+            return False
+        return super().__exit__(exc_type, exc, tb)
+
+def _connect():
+    """Öffnet eine neue DB-Verbindung mit den gemeinsamen Einstellungen."""
+    conn = sqlite3.connect(DB_FILE, timeout=10, factory=_Connection)
     conn.row_factory = sqlite3.Row
+    # WAL (in init_db gesetzt) verträgt NORMAL ohne Risiko für die Konsistenz
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def get_db():
+    """Liefert die DB-Verbindung des aktuellen Threads (wird beim ersten Aufruf geöffnet).
+       `with get_db() as db:` schließt eine Transaktion ab, die Verbindung bleibt offen.
+       Verschachtelte Blöcke (z.B. log_op() innerhalb eines Blocks) gehören zur äußeren Transaktion."""
+    cached = getattr(_db_local, 'conn', None)
+    if cached is not None and cached[0] == DB_FILE:
+        return cached[1]
+    conn = _connect()
+    _db_local.conn = (DB_FILE, conn)
+    if cached is not None:
+        cached[1].close()
     return conn
 
 def init_db():
     """Initialisiert die SQLite-Datenbank und erforderliche Tabellen, falls noch nicht vorhanden."""
     with get_db() as db:
+        # WAL bleibt in der Datenbankdatei gespeichert; Leser blockieren Schreiber nicht mehr
+        db.execute('PRAGMA journal_mode=WAL')
         db.executescript("""
         CREATE TABLE IF NOT EXISTS disks(
           device TEXT PRIMARY KEY,
@@ -56,6 +115,12 @@ def init_db():
           health TEXT,
           ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+        CREATE TABLE IF NOT EXISTS validations(
+          op_id INTEGER PRIMARY KEY,
+          device TEXT,
+          blocks INTEGER,
+          bad_blocks TEXT
+        );
         CREATE TABLE IF NOT EXISTS remotes(
           id INTEGER PRIMARY KEY AUTOINCREMENT,
           name TEXT,
@@ -72,6 +137,16 @@ def init_db():
                 db.execute("ALTER TABLE disks ADD COLUMN serial TEXT")
             except Exception:
                 pass
+        # Indizes für Dashboard (Status/Health-Zählungen, Gruppierung nach Gerät) und Verlauf (ORDER BY ts)
+        db.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_ops_status ON operations(status);
+        CREATE INDEX IF NOT EXISTS idx_ops_device_ts ON operations(device, ts);
+        CREATE INDEX IF NOT EXISTS idx_ops_ts ON operations(ts);
+        CREATE INDEX IF NOT EXISTS idx_smart_health ON smart_history(health);
+        CREATE INDEX IF NOT EXISTS idx_smart_ts ON smart_history(ts);
+        """)
+        # Statistiken für den Query-Planer nur bei Bedarf auffrischen
+        db.execute('PRAGMA optimize')
 
 def run(cmd):
     """Führt einen Shell-Befehl aus und gibt den gesamten Output zurück."""
@@ -98,11 +173,11 @@ def run(cmd):
     # OR absolute paths that start with / and don't contain path traversal
     if executable.startswith('/'):
         # For absolute paths, ensure no path traversal patterns
-        if '..' in executable or not re.match(r'^/[a-zA-Z0-9/_-]+$', executable):
+        if '..' in executable or not _EXECUTABLE_ABS_RE.match(executable):
             raise ValueError(f"Invalid command executable: path traversal detected")
     else:
         # For command names, only allow safe characters
-        if not re.match(r'^[a-zA-Z0-9_-]+$', executable):
+        if not _EXECUTABLE_REL_RE.match(executable):
             raise ValueError(f"Invalid command executable: {executable}")
     
     try:
@@ -135,24 +210,54 @@ def get_serial(dev):
         pass
     return None
 
+# smartctl -i kann bei HDDs Sekunden dauern; die Abfragen laufen daher parallel
+SERIAL_WORKERS = 8
+_serial_executor = ThreadPoolExecutor(max_workers=SERIAL_WORKERS, thread_name_prefix='disk-serial')
+
+def sync_disks_if_stale(max_age=SYNC_MIN_INTERVAL):
+    """Führt sync_disks nur aus, wenn der letzte Sync älter als max_age Sekunden ist.
+       Gleichzeitige Aufrufe warten auf den laufenden Sync, statt einen eigenen zu starten."""
+    with _sync_lock:
+        if time.monotonic() - _last_sync < max_age:
+            return
+        sync_disks()
+
+def refresh_disks_async(max_age=SYNC_MIN_INTERVAL):
+    """Startet sync_disks im Hintergrund, wenn der letzte Sync älter als max_age Sekunden ist
+       und gerade keiner läuft; Seitenaufrufe lesen solange den Stand aus der Datenbank.
+       Nur vor dem allerersten Sync wird gewartet, damit die Liste nicht veraltet angezeigt wird."""
+    global _sync_future
+    with _sync_future_lock:
+        first = _last_sync == 0.0
+        future = _sync_future
+        if future is None or future.done():
+            if not first and time.monotonic() - _last_sync < max_age:
+                return
+            future = _sync_future = _sync_executor.submit(sync_disks_if_stale, max_age)
+    if first:
+        future.result()
+
 def sync_disks():
     """Synchronisiert die aktuelle Geräteliste in die Datenbank.
        Setzt 'present' für alle alten Geräte auf 0 und fügt neue ein.
        Startet bei Auto-Modus ggf. automatische Aufgaben (Format, SMART)."""
-    global auto_enabled
+    global auto_enabled, _last_sync
+    _last_sync = time.monotonic()
     # Use SQLite-compatible timestamp format for comparison
     now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     new_devices = []
+    disks = ls_disks()
+    # Seriennummern vorab und parallel ermitteln, nicht innerhalb der Transaktion
+    serials = list(_serial_executor.map(get_serial, [d['name'] for d in disks]))
     with get_db() as db:
+        # Alles in einer Transaktion: ein Commit für das Zurücksetzen und alle Geräte
         db.execute('UPDATE disks SET present = 0')
-        for d in ls_disks():
-            serial = get_serial(d['name'])
-            db.execute(
-                '''INSERT OR REPLACE INTO disks(device, serial, model, size, present, first_seen)
-                   VALUES (?, ?, ?, ?, 1,
-                           COALESCE((SELECT first_seen FROM disks WHERE device=?), CURRENT_TIMESTAMP))''',
-                (d['name'], serial, d.get('model'), d.get('size'), d['name'])
-            )
+        db.executemany(
+            '''INSERT OR REPLACE INTO disks(device, serial, model, size, present, first_seen)
+               VALUES (?, ?, ?, ?, 1,
+                       COALESCE((SELECT first_seen FROM disks WHERE device=?), CURRENT_TIMESTAMP))''',
+            [(d['name'], serial, d.get('model'), d.get('size'), d['name']) for d, serial in zip(disks, serials)]
+        )
         # Finde neu hinzugekommene Devices (first_seen >= now)
         rows = db.execute('SELECT device FROM disks WHERE first_seen >= ?', (now,)).fetchall()
         for r in rows:
@@ -167,12 +272,36 @@ def sync_disks():
             start_smart(dev, 'short')
 
 # --- Operations-Logging in DB ---
-def log_op(device, action):
+# Zähler, der bei jeder Änderung an der Operations-Tabelle erhöht wird; Leser warten darauf
+_op_version = 0
+_op_changed = threading.Condition()
+
+def _notify_op_changed():
+    global _op_version
+    with _op_changed:
+        _op_version += 1
+        _op_changed.notify_all()
+
+def op_version():
+    """Liefert den aktuellen Änderungszähler der Operations-Tabelle."""
+    return _op_version
+
+def wait_op_changed(version, timeout):
+    """
+    Blockiert, bis sich die Operations-Tabelle seit version geändert hat oder
+    timeout Sekunden vergangen sind, und liefert den neuen Zählerstand.
+    """
+    with _op_changed:
+        _op_changed.wait_for(lambda: _op_version != version, timeout)
+        return _op_version
+
+def log_op(device, action, status='RUNNING'):
     """Erzeugt einen neuen Eintrag in der Operations-Tabelle und gibt die ID zurück."""
     with get_db() as db:
         cur = db.execute('INSERT INTO operations(device, action, status, progress) VALUES (?, ?, ?, 0)',
-                         (device, action, 'RUNNING'))
-        return cur.lastrowid
+                         (device, action, status))
+    _notify_op_changed()
+    return cur.lastrowid
 
 def update_op(op_id, status=None, progress=None):
     """Aktualisiert Status/Progress eines laufenden Operations-Eintrags."""
@@ -187,10 +316,40 @@ def update_op(op_id, status=None, progress=None):
     vals.append(op_id)
     with get_db() as db:
         db.execute(f"UPDATE operations SET {','.join(sets)} WHERE id=?", vals)
+    _notify_op_changed()
 
 # --- Langlaufende Tasks (Formatierung, SMART-Test) ---
-def format_worker(device, fs, op_id):
-    """Führt die Formatierung eines Geräts aus (Hintergrund-Thread)."""
+# Begrenzt, wie viele Disk-Operationen gleichzeitig laufen; weitere warten als QUEUED
+DISK_OP_WORKERS = 4
+_disk_executor = ThreadPoolExecutor(max_workers=DISK_OP_WORKERS, thread_name_prefix='diskop')
+# op_id -> Future der noch nicht beendeten Tasks, damit wartende abgebrochen werden können
+_task_futures = {}
+_task_futures_lock = threading.Lock()
+# Status, in denen ein Task noch nicht beendet ist
+ACTIVE_STATUSES = ('QUEUED', 'RUNNING')
+
+def submit_task(device, action, fn, *args):
+    """Legt einen Operations-Eintrag (QUEUED) an und führt fn(op_id, *args) im Disk-Pool aus."""
+    op_id = log_op(device, action, status='QUEUED')
+    with _task_futures_lock:
+        future = _disk_executor.submit(_run_task, op_id, fn, *args)
+        _task_futures[op_id] = future
+    future.add_done_callback(lambda f: _forget_task(op_id))
+    return op_id
+
+def _forget_task(op_id):
+    with _task_futures_lock:
+        _task_futures.pop(op_id, None)
+
+def _run_task(op_id, fn, *args):
+    # Inzwischen gestoppte Tasks nicht mehr starten
+    if get_task_status(op_id)[0] != 'QUEUED':
+        return
+    update_op(op_id, status='RUNNING')
+    fn(op_id, *args)
+
+def format_worker(op_id, device, fs):
+    """Führt die Formatierung eines Geräts aus (im Disk-Pool)."""
     try:
         device = sanitize_device_name(device)
         path = f'/dev/{device}'
@@ -204,88 +363,162 @@ def format_worker(device, fs, op_id):
         update_op(op_id, status='FAIL', progress=0)
 
 def start_format(device, fs):
-    """Startet einen Formatierungsthread für device mit Dateisystem fs."""
-    op_id = log_op(device, f'FORMAT_{fs}')
-    threading.Thread(target=format_worker, args=(device, fs, op_id), daemon=True).start()
-    return op_id
+    """Stellt die Formatierung von device mit Dateisystem fs in die Warteschlange und liefert die op_id."""
+    return submit_task(device, f'FORMAT_{fs}', format_worker, device, fs)
+
+def smart_worker(op_id, device, mode):
+    """Startet den SMART-Selbsttest; er läuft danach im Laufwerk selbst weiter."""
+    # run() liefert auch Fehler als Text zurück; smartctl bestätigt den Start mit
+    # "Testing has begun" (ATA) bzw. "Self-test has begun" (NVMe)
+    out = run(['smartctl', '-t', mode, f'/dev/{device}'])
+    if 'has begun' in out:
+        update_op(op_id, status='OK', progress=100)
+    else:
+        update_op(op_id, status='FAIL')
 
 def start_smart(device, mode):
-    """Startet einen SMART-Test (kurz/lang) für device."""
+    """Stellt einen SMART-Test (kurz/lang) für device in die Warteschlange und liefert die op_id."""
     device = sanitize_device_name(device)
     if mode not in ('short', 'long'):
         raise ValueError("Invalid SMART mode")
-    run(['smartctl', '-t', mode, f'/dev/{device}'])
-    log_op(device, f'SMART_{mode.upper()}')
+    return submit_task(device, f'SMART_{mode.upper()}', smart_worker, device, mode)
+
+def validate_worker(op_id, device):
+    """Führt die Blockprüfung aus (im Disk-Pool) und speichert das Ergebnis."""
+    def on_progress(done, total):
+        # Gestoppte Prüfungen abbrechen
+        if get_task_status(op_id)[0] != 'RUNNING':
+            return False
+        update_op(op_id, progress=done * 100 // total)
+    try:
+        blocks, bad = validate_blocks(device, on_progress)
+        if get_task_status(op_id)[0] != 'RUNNING':
+            return
+        with get_db() as db:
+            db.execute('INSERT OR REPLACE INTO validations(op_id, device, blocks, bad_blocks) VALUES (?, ?, ?, ?)',
+                       (op_id, device, len(blocks), json.dumps(bad)))
+        update_op(op_id, status='OK', progress=100)
+    except Exception:
+        update_op(op_id, status='FAIL')
+
+def start_validate(device):
+    """Stellt die Blockprüfung von device in die Warteschlange und liefert die op_id."""
+    device = sanitize_device_name(device)
+    return submit_task(device, 'VALIDATE', validate_worker, device)
+
+def get_validation(op_id):
+    """Liefert (device, blocks, bad_blocks) einer abgeschlossenen Blockprüfung oder None."""
+    row = get_db().execute("SELECT device, blocks, bad_blocks FROM validations WHERE op_id=?", (op_id,)).fetchone()
+    if not row:
+        return None
+    return row['device'], range(row['blocks']), set(json.loads(row['bad_blocks']))
+
+def _parse_smart_report(text):
+    """Liefert (Temperatur, Health) aus einem smartctl-Bericht."""
+    m = _TEMPERATURE_RE.search(text)
+    temp = int(m.group(1)) if m else None
+    health = 'BAD' if 'FAILING_NOW' in text else 'GOOD'
+    return temp, health
 
 def view_smart(device):
     """Liest SMART-Report via smartctl und loggt Temperatur/Health in die History."""
     device = sanitize_device_name(device)
     out = run(['smartctl', '-a', f'/dev/{device}'])
-    m = re.search(r'Temperature_Celsius.*\s(\d+)', out)
-    temp = int(m.group(1)) if m else None
-    health = 'BAD' if 'FAILING_NOW' in out else 'GOOD'
+    temp, health = _parse_smart_report(out)
     with get_db() as db:
         db.execute('INSERT INTO smart_history(device, serial, temp, health) VALUES (?, ?, ?, ?)',
                    (device, None, temp, health))
     return out
 
-def validate_blocks(device):
-    """Prüft die ersten Blöcke eines Geräts mit direkten Leseversuchen und markiert fehlerhafte Blöcke."""
+# Nach so vielen Blöcken meldet validate_blocks den Fortschritt
+VALIDATE_PROGRESS_STEP = 16
+# Blockgröße der Leseprüfung in Bytes
+VALIDATE_BLOCK_SIZE = 4096
+
+def validate_blocks(device, on_progress=None):
+    """
+    Prüft die ersten Blöcke eines Geräts mit direkten Leseversuchen und markiert fehlerhafte Blöcke.
+    on_progress(done, total) wird regelmäßig aufgerufen; liefert es False, bricht die Prüfung ab.
+    """
     device = sanitize_device_name(device)
     # Versuche, die ersten N Blöcke (z.B. 256) zu lesen und sammle fehlerhafte Indices
     max_blocks = 256
     bad_blocks = []
-    blocks = []
-    # Bestimme Gerätgröße in Bytes
-    try:
-        size_out = run(['blockdev', '--getsize64', f'/dev/{device}']).strip()
-        size = int(size_out)
-    except Exception:
-        size = None
-    if size:
-        count = size // 4096
-        blocks = list(range(min(count, max_blocks)))
-    else:
-        blocks = list(range(max_blocks))
 
-    for b in blocks:
-        # Lese einen Block an Position b (offset = b*4096) mittels dd with count=1
-        offset = b * 4096
+    # Gerät einmal öffnen und jeden Block mit pread lesen, statt pro Block dd zu starten.
+    # O_DIRECT umgeht den Page-Cache, damit wirklich vom Datenträger gelesen wird;
+    # der Puffer aus mmap ist passend ausgerichtet.
+    path = f'/dev/{device}'
+    o_direct = getattr(os, 'O_DIRECT', 0)
+    try:
+        fd = os.open(path, os.O_RDONLY | o_direct)
+    except OSError:
+        if not o_direct:
+            raise
+        # Nicht jedes Gerät/Dateisystem unterstützt O_DIRECT
+        fd = os.open(path, os.O_RDONLY)
+    buf = mmap.mmap(-1, VALIDATE_BLOCK_SIZE)
+    try:
+        # Gerätgröße in Bytes: das Ende eines Blockgeräts liefert lseek direkt (wie blockdev --getsize64)
         try:
-            # dd will return non-zero on read errors; capture output
-            res = subprocess.run(['dd', 'if=' + f'/dev/{device}', 'bs=4096', 'count=1', 'skip=' + str(b)],
-                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if res.returncode != 0:
+            size = os.lseek(fd, 0, os.SEEK_END)
+        except OSError:
+            size = None
+        if size:
+            count = size // VALIDATE_BLOCK_SIZE
+            blocks = list(range(min(count, max_blocks)))
+        else:
+            blocks = list(range(max_blocks))
+
+        total = len(blocks)
+        for i, b in enumerate(blocks):
+            if on_progress is not None and i % VALIDATE_PROGRESS_STEP == 0 and on_progress(i, total) is False:
+                break
+            try:
+                os.preadv(fd, [buf], b * VALIDATE_BLOCK_SIZE)
+            except OSError:
                 bad_blocks.append(b)
-        except Exception:
-            bad_blocks.append(b)
+    finally:
+        buf.close()
+        os.close(fd)
     return blocks, bad_blocks
 
 # --- Hilfsfunktionen für UI/DB-Abfragen (für Flask-Routen) ---
+# Belegung wird für so viele Sekunden wiederverwendet (mehrere Seitenaufrufe kurz hintereinander)
+USAGE_CACHE_TTL = 5
+# (gelesen_um, Usage-Map)
+_usage_cache = (float('-inf'), {})
+PROC_MOUNTS = '/proc/mounts'
+
 def _parse_df_usage():
-    """Parst `df -h` und versucht, Usage-Prozent pro /dev/<name> zurückzugeben."""
-    out = run(['df', '-h'])
+    """Liefert Usage-Prozent (wie `df`, z.B. '54%') pro /dev/<name> aus /proc/mounts und statvfs."""
+    global _usage_cache
+    read_at, usage = _usage_cache
+    now = time.monotonic()
+    if now - read_at < USAGE_CACHE_TTL:
+        return usage
     usage = {}
     try:
-        for line in out.splitlines()[1:]:
-            parts = line.split()
-            if len(parts) < 6:
-                continue
-            dev = parts[0]
-            perc = parts[4]
-            # nur /dev/... Einträge
-            if dev.startswith('/dev/'):
-                # extrahiere Geräteshortname, z.B. /dev/sda1 -> sda
-                name = os.path.basename(dev)
-                # strip partition numbers for simple match: sda1 -> sda
-                m = re.match(r'([a-zA-Z0-9]+)', name)
-                if m:
-                    base = re.match(r'([a-zA-Z]+)', name)
-                    # fallback: use name as key
-                    key = base.group(1) if base else name
-                    usage[key] = perc
-    except Exception:
-        pass
+        with open(PROC_MOUNTS) as f:
+            mounts = [line.split()[:2] for line in f if line.startswith('/dev/')]
+    except OSError:
+        mounts = []
+    for dev, mountpoint in mounts:
+        try:
+            st = os.statvfs(_MOUNT_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), mountpoint))
+        except OSError:
+            continue
+        used = st.f_blocks - st.f_bfree
+        if used + st.f_bavail <= 0:
+            continue
+        # extrahiere Geräteshortname, z.B. /dev/sda1 -> sda
+        name = os.path.basename(dev)
+        base = _DEVICE_BASE_RE.match(name)
+        # fallback: use name as key
+        key = base.group(1) if base else name
+        # wie df: Anteil am für Benutzer verfügbaren Platz, aufgerundet
+        usage[key] = f"{-(-used * 100 // (used + st.f_bavail))}%"
+    _usage_cache = (now, usage)
     return usage
 
 
@@ -308,7 +541,7 @@ def get_disk_list(filter_str=''):
         u = usage_map.get(dev)
         # if not found, also try stripping numeric suffix
         if not u:
-            base = re.match(r'([a-zA-Z]+)', dev)
+            base = _DEVICE_BASE_RE.match(dev)
             if base:
                 u = usage_map.get(base.group(1))
         d['usage'] = u
@@ -329,44 +562,104 @@ def clear_history():
     with get_db() as db:
         db.execute("DELETE FROM operations")
         db.execute("DELETE FROM smart_history")
+    _invalidate_dashboard_cache()
+
+
+# Teure Teile der Dashboard-Zusammenfassung (BAD-Anzahl, Geräte mit Operationen).
+# Beide Tabellen werden nur ergänzt oder geleert und vergeben IDs per AUTOINCREMENT,
+# daher ändert sich der Schlüssel (höchste IDs) bei jeder relevanten Änderung.
+_dash_cache = {'key': None, 'bad': 0, 'runtimes': []}
+_dash_cache_lock = threading.Lock()
 
+def _invalidate_dashboard_cache():
+    with _dash_cache_lock:
+        _dash_cache['key'] = None
 
 def get_dashboard_data():
     """Erstellt eine Zusammenfassung für das Dashboard (Anzahlen, etc.)."""
     with get_db() as db:
         total = db.execute("SELECT COUNT(*) FROM disks").fetchone()[0]
+        running = db.execute("SELECT COUNT(*) FROM operations WHERE status IN ('QUEUED', 'RUNNING')").fetchone()[0]
+        key = tuple(db.execute("SELECT (SELECT MAX(id) FROM smart_history), (SELECT MAX(id) FROM operations)").fetchone())
+        with _dash_cache_lock:
+            if _dash_cache['key'] == key:
+                return {'total': total, 'bad': _dash_cache['bad'], 'running': running,
+                        'runtimes': list(_dash_cache['runtimes'])}
         bad = db.execute("SELECT COUNT(*) FROM smart_history WHERE health='BAD'").fetchone()[0]
-        running = db.execute("SELECT COUNT(*) FROM operations WHERE status='RUNNING'").fetchone()[0]
         runtimes = []
         for row in db.execute("SELECT device, MIN(ts) AS first_ts FROM operations GROUP BY device").fetchall():
             runtimes.append({'device': row['device'], 'runtime': 'n/a'})
-    return {'total': total, 'bad': bad, 'running': running, 'runtimes': runtimes}
+    with _dash_cache_lock:
+        _dash_cache.update(key=key, bad=bad, runtimes=runtimes)
+    return {'total': total, 'bad': bad, 'running': running, 'runtimes': list(runtimes)}
 
 
-def export_smart_data():
-    """Exportiert die SMART-Historie in eine CSV-Datei im uploads/ Ordner und gibt den Dateipfad zurück."""
-    path = UPLOAD_DIR / 'smart.csv'
-    with get_db() as db, open(path, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['id', 'device', 'serial', 'temp', 'health', 'ts'])
-        for row in db.execute("SELECT * FROM smart_history").fetchall():
-            writer.writerow(tuple(row))
-    return path
-
+def smart_data_version():
+    """Liefert eine Kennung für den aktuellen Stand der SMART-Historie.
+       Einträge werden nur eingefügt oder gelöscht, daher ändern Anzahl und höchste ID sich bei jeder Änderung."""
+    with get_db() as db:
+        count, max_id = db.execute("SELECT COUNT(*), MAX(id) FROM smart_history").fetchone()
+    return f"{count}-{max_id or 0}"
+
+def iter_smart_csv(chunk_rows=500):
+    """Liefert die SMART-Historie als CSV in Stücken (bytes) von je chunk_rows Zeilen,
+       damit der Export direkt gestreamt werden kann, ohne Zwischendatei."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(SMART_CSV_HEADER)
+    # Eigene Verbindung, da der Generator über mehrere Aufrufe hinweg offen bleibt
+    db = _connect()
+    # Einfache Tupel statt sqlite3.Row, die der csv-Writer direkt übernimmt
+    db.row_factory = None
+    try:
+        cur = db.execute(f"SELECT {', '.join(SMART_CSV_HEADER)} FROM smart_history")
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            writer.writerows(rows)
+            data = buf.getvalue()
+            if data:
+                yield data.encode('utf-8')
+            if not rows:
+                return
+            buf.seek(0)
+            buf.truncate()
+    finally:
+        db.close()
+
+
+SMART_CSV_HEADER = ['id', 'device', 'serial', 'temp', 'health', 'ts']
+IMPORT_BATCH_ROWS = 1000
 
 def import_smart_data(file_storage, device='UNKNOWN'):
-    """Importiert einen SMART-Bericht aus einer hochgeladenen Datei in die smart_history Tabelle."""
-    filename = file_storage.filename or "smart_upload.txt"
-    path = UPLOAD_DIR / filename
-    file_storage.save(path)
-    text = path.read_text()
-    m = re.search(r'Temperature_Celsius.*\s(\d+)', text)
-    temp = int(m.group(1)) if m else None
-    health = 'BAD' if 'FAILING_NOW' in text else 'GOOD'
+    """Importiert einen SMART-Bericht aus einer hochgeladenen Datei in die smart_history Tabelle.
+       Eine CSV-Datei im Format von iter_smart_csv wird vollständig übernommen."""
+    # Direkt aus dem Upload lesen, ohne Zwischendatei in uploads/
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8', errors='replace', newline='')
+    first_line = stream.readline()
+    if next(csv.reader([first_line]), None) == SMART_CSV_HEADER:
+        return _import_smart_csv(stream)
+    text = first_line + stream.read()
+    temp, health = _parse_smart_report(text)
     with get_db() as db:
         db.execute("INSERT INTO smart_history(device, serial, temp, health) VALUES (?, ?, ?, ?)",
                    (device, None, temp, health))
 
+def _import_smart_csv(stream):
+    """Übernimmt die Zeilen eines SMART-CSV-Exports stapelweise in einer einzigen Transaktion."""
+    sql = "INSERT INTO smart_history(device, serial, temp, health, ts) VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+    batch = []
+    with get_db() as db:
+        for row in csv.reader(stream):
+            if len(row) < 6:
+                continue  # Leer- oder Teilzeilen überspringen
+            _, dev, serial, temp, health, ts = row[:6]
+            batch.append((dev, serial or None, int(temp) if temp.isdigit() else None, health, ts or None))
+            if len(batch) >= IMPORT_BATCH_ROWS:
+                db.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            db.executemany(sql, batch)
+
 # --- Remote management helpers ---
 def add_remote(name, host, port=22, enabled=1):
     with get_db() as db:
@@ -381,7 +674,7 @@ def remove_remote(remote_id):
     with get_db() as db:
         db.execute("DELETE FROM remotes WHERE id=?", (remote_id,))
 
-# Task helpers (existing): get_task_status, get_task_action, stop_task, auto_mode_worker
+# Task helpers (existing): get_task_status, get_task_action, stop_task, auto_mode_check
 
 def get_task_status(op_id):
     row = get_db().execute("SELECT status, progress FROM operations WHERE id=?", (op_id,)).fetchone()
@@ -394,11 +687,43 @@ def get_task_action(op_id):
 def stop_task(op_id):
     with get_db() as db:
         db.execute("UPDATE operations SET status='STOPPED' WHERE id=?", (op_id,))
-
-# Hintergrund-Thread Funktion für Auto-Sync
-def auto_mode_worker():
-    import time
-    while True:
-        time.sleep(10)  # alle 10 Sekunden prüfen
-        if auto_enabled:
-            sync_disks()
+    _notify_op_changed()
+    # Noch wartende Tasks gar nicht erst starten
+    with _task_futures_lock:
+        future = _task_futures.get(op_id)
+    if future is not None:
+        future.cancel()
+
+# Auto-Sync, wird vom Scheduler alle AUTO_MODE_INTERVAL Sekunden aufgerufen,
+# falls keine udev-Ereignisse zur Verfügung stehen
+AUTO_MODE_INTERVAL = 10
+
+def auto_mode_check():
+    if auto_enabled:
+        sync_disks()
+
+_udev_observer = None
+
+def _on_udev_event(device):
+    # Nur hinzugefügte/entfernte Disks; der Sync läuft im Sync-Thread, nicht im udev-Thread
+    if auto_enabled and device.action in ('add', 'remove'):
+        _sync_executor.submit(sync_disks)
+
+def start_auto_mode_monitor():
+    """Startet die Überwachung von udev-Ereignissen für Disks (über pyudev).
+       Liefert False, wenn das nicht möglich ist; dann muss auto_mode_check gepollt werden."""
+    global _udev_observer
+    if _udev_observer is not None:
+        return True
+    if pyudev is None:
+        return False
+    try:
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by('block', device_type='disk')
+        observer = pyudev.MonitorObserver(monitor, callback=_on_udev_event, name='disk-udev')
+        observer.daemon = True
+        observer.start()
+    except Exception:
+        return False
+    _udev_observer = observer
+    return True
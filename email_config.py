@@ -7,44 +7,65 @@ import os
 
 EMAIL_CONFIG_FILE = "email_settings.json"
 
-def load_email_settings():
-    """Load email settings from configuration file"""
+DEFAULT_EMAIL_SETTINGS = {
+    "email_enabled": False,
+    "smtp_server": "",
+    "smtp_port": 587,
+    "smtp_use_tls": True,
+    "smtp_username": "",
+    "smtp_password": "",
+    "sender_email": "",
+    "recipient_emails": [],
+    "report_enabled": False,
+    "report_interval": "weekly",
+    "error_notifications_enabled": True
+}
+
+# (st_mtime_ns, parsed settings) of the last read, reused until the file changes
+_settings_cache = (None, None)
+
+def _cached_settings():
+    """Return the parsed settings without copying; callers must not modify them."""
+    global _settings_cache
     try:
-        if os.path.exists(EMAIL_CONFIG_FILE):
-            with open(EMAIL_CONFIG_FILE, "r") as f:
-                return json.load(f)
+        mtime = os.stat(EMAIL_CONFIG_FILE).st_mtime_ns
+    except OSError:
+        return DEFAULT_EMAIL_SETTINGS
+    cached_mtime, cached = _settings_cache
+    if cached_mtime == mtime:
+        return cached
+    try:
+        with open(EMAIL_CONFIG_FILE, "r") as f:
+            settings = json.load(f)
     except Exception:
-        pass
-    return {
-        "email_enabled": False,
-        "smtp_server": "",
-        "smtp_port": 587,
-        "smtp_use_tls": True,
-        "smtp_username": "",
-        "smtp_password": "",
-        "sender_email": "",
-        "recipient_emails": [],
-        "report_enabled": False,
-        "report_interval": "weekly",
-        "error_notifications_enabled": True
-    }
+        settings = DEFAULT_EMAIL_SETTINGS
+    _settings_cache = (mtime, settings)
+    return settings
+
+def load_email_settings():
+    """Load email settings from configuration file"""
+    # A copy, so callers can update it before save_email_settings()
+    return dict(_cached_settings())
 
 def save_email_settings(settings):
     """Save email settings to configuration file"""
+    global _settings_cache
     with open(EMAIL_CONFIG_FILE, "w") as f:
         json.dump(settings, f, indent=2)
+    # Writes within the filesystem's timestamp granularity keep the same mtime
+    _settings_cache = (None, None)
 
 def get_email_enabled():
     """Check if email notifications are enabled"""
-    settings = load_email_settings()
+    settings = _cached_settings()
     return settings.get("email_enabled", False)
 
 def get_report_enabled():
     """Check if scheduled reports are enabled"""
-    settings = load_email_settings()
+    settings = _cached_settings()
     return settings.get("email_enabled", False) and settings.get("report_enabled", False)
 
 def get_error_notifications_enabled():
     """Check if error notifications are enabled"""
-    settings = load_email_settings()
+    settings = _cached_settings()
     return settings.get("email_enabled", False) and settings.get("error_notifications_enabled", False)
@@ -3,15 +3,87 @@ Email notification system for the Linux Management Dashboard.
 Sends scheduled reports and error notifications via SMTP.
 """
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from itertools import islice
 import json
 import logging
 import email_config
 
 logger = logging.getLogger(__name__)
 
+# Shared SMTP connection while at least one smtp_session() is active
+_smtp_lock = threading.Lock()
+_smtp_sessions = 0
+_smtp_conn = None  # (connection settings, SMTP)
+
+def _connection_key(settings):
+    return (settings['smtp_server'], settings['smtp_port'], settings.get("smtp_use_tls", True),
+            settings.get("smtp_username"), settings.get("smtp_password"))
+
+def _connect(settings):
+    """Open an SMTP connection with STARTTLS and login done as configured."""
+    server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'])
+    try:
+        if settings.get("smtp_use_tls", True):
+            server.starttls()
+        
+        # Login if credentials provided
+        if settings.get("smtp_username") and settings.get("smtp_password"):
+            server.login(settings['smtp_username'], settings['smtp_password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+def _quit(server):
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+def _session_connection(settings):
+    """Return the shared connection for settings, reconnecting if it is gone (call with _smtp_lock held)."""
+    global _smtp_conn
+    key = _connection_key(settings)
+    if _smtp_conn is not None:
+        conn_key, server = _smtp_conn
+        _smtp_conn = None
+        if conn_key == key:
+            try:
+                if server.noop()[0] == 250:
+                    _smtp_conn = (key, server)
+                    return server
+            except smtplib.SMTPException:
+                pass
+        _quit(server)
+    server = _connect(settings)
+    _smtp_conn = (key, server)
+    return server
+
+@contextmanager
+def smtp_session():
+    """
+    Send every email of the block (from any thread) over one SMTP connection,
+    instead of connecting and logging in again for each message.
+    """
+    global _smtp_sessions, _smtp_conn
+    with _smtp_lock:
+        _smtp_sessions += 1
+    try:
+        yield
+    finally:
+        conn = None
+        with _smtp_lock:
+            _smtp_sessions -= 1
+            if _smtp_sessions == 0:
+                conn, _smtp_conn = _smtp_conn, None
+        if conn is not None:
+            _quit(conn[1])
+
 def send_email(subject, body, html_body=None):
     """
     Send an email using configured SMTP settings.
@@ -24,6 +96,7 @@ def send_email(subject, body, html_body=None):
     Returns:
         tuple: (success: bool, error_message: str or None)
     """
+    global _smtp_conn
     settings = email_config.load_email_settings()
     
     if not settings.get("email_enabled", False):
@@ -50,19 +123,23 @@ def send_email(subject, body, html_body=None):
             msg.attach(MIMEText(html_body, 'html'))
         
         # Connect to SMTP server and send
-        if settings.get("smtp_use_tls", True):
-            server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'])
-            server.starttls()
-        else:
-            server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'])
-        
-        # Login if credentials provided
-        if settings.get("smtp_username") and settings.get("smtp_password"):
-            server.login(settings['smtp_username'], settings['smtp_password'])
-        
-        # Send email
-        server.send_message(msg)
-        server.quit()
+        with _smtp_lock:
+            shared = _smtp_sessions > 0
+            if shared:
+                server = _session_connection(settings)
+                try:
+                    server.send_message(msg)
+                except Exception:
+                    # Don't reuse a connection in an unknown state
+                    _smtp_conn = None
+                    _quit(server)
+                    raise
+        if not shared:
+            server = _connect(settings)
+            try:
+                server.send_message(msg)
+            finally:
+                _quit(server)
         
         logger.info(f"Email sent successfully: {subject}")
         return True, None
@@ -95,43 +172,46 @@ def send_update_report(hosts_status, history):
         return False, "Scheduled reports are disabled"
     
     # Generate report content
-    subject = f"Linux Management Dashboard - System Report ({datetime.now().strftime('%Y-%m-%d')})"
+    now = datetime.now()
+    subject = f"Linux Management Dashboard - System Report ({now.strftime('%Y-%m-%d')})"
+    generated = now.strftime('%Y-%m-%d %H:%M:%S')
+    # Last 10 updates, oldest first, without copying the whole history
+    recent_updates = list(islice(reversed(history.items()), 10))[::-1] if history else []
     
     # Plain text body
-    body = f"""Linux Management Dashboard - System Status Report
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    body = [f"""Linux Management Dashboard - System Status Report
+Generated: {generated}
 
 === HOST STATUS ===
-"""
+"""]
     
     for hostname, status in hosts_status.items():
         status_text = "ONLINE" if status else "OFFLINE"
-        body += f"  {hostname}: {status_text}\n"
+        body.append(f"  {hostname}: {status_text}\n")
     
-    body += f"""
+    body.append("""
 === RECENT UPDATE HISTORY ===
-"""
+""")
     
     if history:
-        recent_updates = list(history.items())[-10:]  # Last 10 updates
         for host, updates in recent_updates:
-            body += f"\n{host}:\n"
+            body.append(f"\n{host}:\n")
             if updates:
                 latest = updates[-1] if isinstance(updates, list) else updates
-                body += f"  Last update: {latest}\n"
+                body.append(f"  Last update: {latest}\n")
     else:
-        body += "  No update history available\n"
+        body.append("  No update history available\n")
     
-    body += """
+    body.append("""
 ---
 This is an automated report from Linux Management Dashboard
-"""
+""")
     
     # HTML body
-    html_body = f"""<html>
+    html_body = [f"""<html>
 <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
     <h2 style="color: #2c3e50;">Linux Management Dashboard - System Status Report</h2>
-    <p style="color: #7f8c8d;">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    <p style="color: #7f8c8d;">Generated: {generated}</p>
     
     <h3 style="color: #34495e; margin-top: 30px;">Host Status</h3>
     <table style="border-collapse: collapse; width: 100%; max-width: 600px;">
@@ -142,47 +222,46 @@ This is an automated report from Linux Management Dashboard
             </tr>
         </thead>
         <tbody>
-"""
+"""]
     
     for hostname, status in hosts_status.items():
         status_text = "ONLINE" if status else "OFFLINE"
         status_color = "#27ae60" if status else "#e74c3c"
-        html_body += f"""
+        html_body.append(f"""
             <tr>
                 <td style="padding: 10px; border: 1px solid #ddd;">{hostname}</td>
                 <td style="padding: 10px; border: 1px solid #ddd; color: {status_color}; font-weight: bold;">{status_text}</td>
             </tr>
-"""
+""")
     
-    html_body += """
+    html_body.append("""
         </tbody>
     </table>
     
     <h3 style="color: #34495e; margin-top: 30px;">Recent Update History</h3>
-"""
+""")
     
     if history:
-        recent_updates = list(history.items())[-10:]
-        html_body += "<ul>"
+        html_body.append("<ul>")
         for host, updates in recent_updates:
-            html_body += f"<li><strong>{host}</strong>: "
+            html_body.append(f"<li><strong>{host}</strong>: ")
             if updates:
                 latest = updates[-1] if isinstance(updates, list) else updates
-                html_body += f"{latest}</li>"
+                html_body.append(f"{latest}</li>")
             else:
-                html_body += "No updates</li>"
-        html_body += "</ul>"
+                html_body.append("No updates</li>")
+        html_body.append("</ul>")
     else:
-        html_body += "<p>No update history available</p>"
+        html_body.append("<p>No update history available</p>")
     
-    html_body += """
+    html_body.append("""
     <hr style="margin-top: 30px; border: none; border-top: 1px solid #ddd;">
     <p style="color: #7f8c8d; font-size: 0.9em;">This is an automated report from Linux Management Dashboard</p>
 </body>
 </html>
-"""
+""")
     
-    return send_email(subject, body, html_body)
+    return send_email(subject, "".join(body), "".join(html_body))
 
 def send_error_notification(hostname, error_message):
     """
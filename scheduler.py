@@ -1,5 +1,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from updater import run_update
+from concurrent.futures import wait
+import threading
+from updater import start_update, UPDATE_WORKERS
 import json
 import os
 import email_config
@@ -7,6 +9,35 @@ import email_notifier
 
 scheduler = BackgroundScheduler()
 
+# Scheduled host updates running at the same time, half of the shared update pool
+SCHEDULED_UPDATE_WORKERS = max(1, UPDATE_WORKERS // 2)
+
+# path -> (st_mtime_ns, parsed data) of the JSON files read by the scheduled jobs
+_json_cache = {}
+
+def _load_json_file(path, default):
+    """
+    Return the parsed JSON file, reusing the last result until its mtime changes.
+    The data is shared between runs and must not be modified. Returns default
+    if the file is missing or invalid.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        cached = _json_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+    _json_cache[path] = (mtime, data)
+    return data
+
+def start_scheduler():
+    """Start the background scheduler thread (called by app.init_services); later calls do nothing."""
+    if not scheduler.running:
+        scheduler.start()
+
 def load_update_settings():
     """Load update settings from configuration file"""
     try:
@@ -33,16 +64,28 @@ def scheduled_updates():
     if not settings.get("automatic_updates_enabled", False):
         return
     
-    # Load hosts with error handling
-    try:
-        with open("hosts.json", "r") as f:
-            hosts = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # No hosts configured or file is corrupted
+    # Load hosts; nothing to do if none are configured or the file is corrupted
+    hosts = _load_json_file("hosts.json", None)
+    if hosts is None:
         return
     
-    for name, h in hosts.items():
-        run_update(h["host"], h["user"], name, [])
+    # Update the hosts in parallel through the same registry as manual updates, so a
+    # host that is already being updated is skipped and the logs show up on its
+    # progress page. At most SCHEDULED_UPDATE_WORKERS run at once, leaving pool
+    # workers free for manual updates and dashboard self-updates.
+    # Error notifications from the run share one SMTP connection.
+    slots = threading.BoundedSemaphore(SCHEDULED_UPDATE_WORKERS)
+    futures = []
+    with email_notifier.smtp_session():
+        for name, h in hosts.items():
+            slots.acquire()
+            future = start_update(name, h)
+            if future is None:
+                slots.release()
+                continue
+            future.add_done_callback(lambda f: slots.release())
+            futures.append(future)
+        wait(futures)
     
     # Update last run time
     import time
@@ -54,19 +97,8 @@ def scheduled_email_report():
     if not email_config.get_report_enabled():
         return
     
-    try:
-        # Load hosts
-        with open("hosts.json", "r") as f:
-            hosts = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        hosts = {}
-    
-    # Load history
-    try:
-        with open("history.json", "r") as f:
-            history = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        history = {}
+    hosts = _load_json_file("hosts.json", {})
+    history = _load_json_file("history.json", {})
     
     # Check host status (simplified - just check if host exists in config)
     hosts_status = {name: True for name in hosts.keys()}
@@ -81,8 +113,10 @@ def configure_scheduler():
     settings = load_update_settings()
     email_settings = email_config.load_email_settings()
     
-    # Remove existing jobs
-    scheduler.remove_all_jobs()
+    # Remove existing update/report jobs; the app's periodic service jobs stay
+    for job_id in ("auto_update", "email_report"):
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
     
     if settings.get("automatic_updates_enabled", False):
         frequency = settings.get("update_frequency", "daily")
@@ -104,7 +138,3 @@ def configure_scheduler():
             scheduler.add_job(scheduled_email_report, "interval", weeks=1, id="email_report")
         elif report_interval == "monthly":
             scheduler.add_job(scheduled_email_report, "interval", days=30, id="email_report")
-
-# Start scheduler
-scheduler.start()
-
@@ -0,0 +1,103 @@
+# ssh_pool.py - Shared pool of authenticated SSH connections
+
+import threading
+import time
+from collections import OrderedDict
+
+import paramiko
+
+# Connections not used for this many seconds are closed
+IDLE_TIMEOUT = 300
+# Upper bound on open connections; the least recently used one is closed first
+MAX_CONNECTIONS = 64
+
+# (host, port, user) -> (SSHClient, last_used), least recently used first
+_pool = OrderedDict()
+_lock = threading.Lock()
+
+
+def _is_alive(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _connect(host, port, user, timeout):
+    client = paramiko.SSHClient()
+    # Security Note: AutoAddPolicy accepts any host key, making this vulnerable to MITM attacks.
+    # For production, use WarningPolicy or maintain a known_hosts file.
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(host, port=port, username=user, timeout=timeout,
+                   banner_timeout=timeout, auth_timeout=timeout)
+    # Keepalives let a dead peer mark the transport inactive before the next use
+    client.get_transport().set_keepalive(30)
+    return client
+
+
+def get(host, user, port=22, timeout=10):
+    """
+    Return a connected SSHClient for (host, port, user), reusing a pooled
+    connection while its transport is still active. Authentication uses the
+    local SSH keys. Raises the paramiko/socket error if connecting fails.
+
+    The client stays in the pool; do not close it, use evict() instead.
+    """
+    key = (host, port, user)
+    now = time.monotonic()
+    to_close = []
+    client = None
+
+    with _lock:
+        for k, (c, last_used) in list(_pool.items()):
+            if now - last_used > IDLE_TIMEOUT:
+                to_close.append(_pool.pop(k)[0])
+        entry = _pool.get(key)
+        if entry is not None:
+            if _is_alive(entry[0]):
+                client = entry[0]
+                _pool[key] = (client, now)
+                _pool.move_to_end(key)
+            else:
+                to_close.append(_pool.pop(key)[0])
+
+    for c in to_close:
+        c.close()
+    if client is not None:
+        return client
+
+    # Connect outside the lock so a slow host doesn't block the others
+    client = _connect(host, port, user, timeout)
+
+    with _lock:
+        existing = _pool.get(key)
+        if existing is not None and _is_alive(existing[0]):
+            # Another thread connected first; keep a single connection per target
+            to_close.append(client)
+            client = existing[0]
+        else:
+            if existing is not None:
+                to_close.append(existing[0])
+            _pool[key] = (client, now)
+        _pool.move_to_end(key)
+        while len(_pool) > MAX_CONNECTIONS:
+            to_close.append(_pool.popitem(last=False)[1][0])
+
+    for c in to_close:
+        c.close()
+    return client
+
+
+def evict(host, user, port=22):
+    """Drop and close the pooled connection for (host, port, user), if any."""
+    with _lock:
+        entry = _pool.pop((host, port, user), None)
+    if entry is not None:
+        entry[0].close()
+
+
+def close_all():
+    """Close every pooled connection."""
+    with _lock:
+        clients = [c for c, _ in _pool.values()]
+        _pool.clear()
+    for c in clients:
+        c.close()
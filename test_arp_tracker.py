@@ -3,6 +3,8 @@ Test suite for ARP tracker functionality
 Tests MAC address detection, IP change detection, and ARP table parsing
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import arp_tracker
@@ -11,6 +13,10 @@ import arp_tracker
 class TestArpTracker(unittest.TestCase):
     """Test cases for arp_tracker module"""
     
+    def setUp(self):
+        """Read the (mocked) ARP table fresh in every test"""
+        arp_tracker.invalidate_arp_cache()
+    
     def test_validate_ip_address(self):
         """Test IP address validation"""
         # Valid IPs
@@ -202,6 +208,14 @@ class TestArpTracker(unittest.TestCase):
         # Ensure original data is preserved
         self.assertEqual(updated_hosts['host1']['user'], 'admin')
         self.assertEqual(updated_hosts['host1']['mac'], '00:11:22:33:44:55')
+        self.assertIs(updated_hosts, hosts)
+    
+    def test_update_host_ips_no_changes(self):
+        """Test that no changes returns the hosts unchanged"""
+        hosts = {'host1': {'host': '192.168.1.10', 'user': 'admin'}}
+        
+        self.assertIs(arp_tracker.update_host_ips(hosts, []), hosts)
+        self.assertEqual(hosts['host1']['host'], '192.168.1.10')
     
     @patch('subprocess.run')
     def test_ping_host_success(self, mock_run):
@@ -222,9 +236,29 @@ class TestArpTracker(unittest.TestCase):
         result = arp_tracker.ping_host('192.168.1.10')
         self.assertFalse(result)
     
+    def test_get_arp_table_proc(self):
+        """Test ARP table retrieval from /proc/net/arp on Linux"""
+        with tempfile.NamedTemporaryFile('w', suffix='.arp', delete=False) as f:
+            f.write('IP address       HW type     Flags       HW address            Mask     Device\n'
+                    '192.168.1.10     0x1         0x2         00:11:22:33:44:55     *        eth0\n'
+                    '192.168.1.20     0x1         0x2         aa:bb:cc:dd:ee:ff     *        eth0\n'
+                    '192.168.1.30     0x1         0x0         00:00:00:00:00:00     *        eth0\n')
+        try:
+            with patch('arp_tracker._IS_WINDOWS', False), \
+                 patch('arp_tracker.PROC_NET_ARP', f.name), \
+                 patch('subprocess.run') as mock_run:
+                arp_table = arp_tracker.get_arp_table()
+            mock_run.assert_not_called()
+        finally:
+            os.remove(f.name)
+        
+        self.assertEqual(len(arp_table), 2)
+        self.assertEqual(arp_table['00:11:22:33:44:55'], '192.168.1.10')
+        self.assertEqual(arp_table['AA:BB:CC:DD:EE:FF'], '192.168.1.20')
+    
     @patch('subprocess.run')
     def test_get_arp_table_linux(self, mock_run):
-        """Test ARP table retrieval on Linux"""
+        """Test ARP table retrieval via 'ip neigh' when /proc/net/arp is not available"""
         # Mock 'ip neigh' output
         mock_run.return_value = MagicMock(
             returncode=0,
@@ -232,13 +266,27 @@ class TestArpTracker(unittest.TestCase):
                    '192.168.1.20 dev eth0 lladdr aa:bb:cc:dd:ee:ff STALE\n'
         )
         
-        with patch('platform.system', return_value='Linux'):
+        with patch('arp_tracker._IS_WINDOWS', False), \
+             patch('arp_tracker.PROC_NET_ARP', '/nonexistent/arp'):
             arp_table = arp_tracker.get_arp_table()
         
         self.assertEqual(len(arp_table), 2)
         self.assertEqual(arp_table['00:11:22:33:44:55'], '192.168.1.10')
         self.assertEqual(arp_table['AA:BB:CC:DD:EE:FF'], '192.168.1.20')
     
+    @patch('arp_tracker._read_arp_table')
+    def test_get_arp_table_cached(self, mock_read):
+        """Test that the ARP table is reused until it is invalidated"""
+        mock_read.return_value = {'00:11:22:33:44:55': '192.168.1.10'}
+        
+        arp_tracker.get_arp_table()
+        arp_tracker.get_mac_address_for_ip('192.168.1.10')
+        self.assertEqual(mock_read.call_count, 1)
+        
+        arp_tracker.invalidate_arp_cache()
+        arp_tracker.get_arp_table()
+        self.assertEqual(mock_read.call_count, 2)
+    
     def test_get_mac_address_for_ip(self):
         """Test MAC address lookup by IP"""
         with patch('arp_tracker.get_arp_table') as mock_get_arp:
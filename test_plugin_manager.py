@@ -83,6 +83,71 @@ def test_addon_loader_status():
         traceback.print_exc()
         return False
 
+def test_device_buttons():
+    """Test that plugins with a page get a button on each device row"""
+    print("\nTesting device buttons...")
+    try:
+        from addon_loader import AddonManager
+        from flask import Flask
+        import disktool_core
+        
+        app = Flask(__name__)
+        addon_mgr = AddonManager(app, disktool_core)
+        addon_mgr.load_addons('addons', 'templates/addons')
+        
+        html = addon_mgr.render_device_buttons('sda')
+        assert 'href="/disks/addons/example_plugin/sda"' in html, "Missing example_plugin button"
+        assert 'plugin_manager' not in html, "Plugin without HTML page got a button"
+        
+        print("✓ Device buttons rendered for plugins with pages")
+        return True
+    except Exception as e:
+        print(f"✗ Device buttons test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_render_hooks_failure():
+    """Test that a failing hook is reported without hiding the other hooks"""
+    print("\nTesting hook failure handling...")
+    try:
+        from addon_loader import AddonManager
+        from flask import Flask
+        import disktool_core
+        
+        calls = []
+        
+        def ok_a(dev):
+            calls.append("a")
+            return f"a-{dev}"
+        
+        def broken(dev):
+            calls.append("broken")
+            raise RuntimeError("boom")
+        
+        def ok_b(dev):
+            calls.append("b")
+            return f"b-{dev}"
+        
+        addon_mgr = AddonManager(Flask(__name__), disktool_core)
+        addon_mgr.hooks["row"] = [ok_a, broken, ok_b]
+        
+        for _ in range(2):
+            calls.clear()
+            html = addon_mgr.render_hooks("row", "sda")
+            assert html.startswith("a-sda "), f"Unexpected hook output: {html}"
+            assert html.endswith(" b-sda"), f"Unexpected hook output: {html}"
+            assert "Fehler: boom" in html, "Hook error not reported"
+            assert calls == ["a", "broken", "b"], f"Each hook must run exactly once: {calls}"
+        
+        print("✓ Failing hooks are reported and skipped past")
+        return True
+    except Exception as e:
+        print(f"✗ Hook failure test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_remote_plugin_json_format():
     """Test that remote plugin JSON format is valid"""
     print("\nTesting remote plugin JSON format...")
@@ -120,6 +185,83 @@ def test_remote_plugin_json_format():
         print(f"✗ JSON format test failed: {e}")
         return False
 
+def test_remote_plugin_cache():
+    """Test that the remote plugin index is cached and revalidated with ETag"""
+    print("\nTesting remote plugin cache...")
+    try:
+        from addons import plugin_manager
+        import requests
+        
+        class FakeResponse:
+            def __init__(self, status_code, payload=None, headers=None):
+                self.status_code = status_code
+                self._payload = payload
+                self.headers = headers or {}
+            
+            @property
+            def content(self):
+                return json.dumps(self._payload).encode('utf-8')
+        
+        class FakeSession:
+            def __init__(self):
+                self.calls = []
+                self.failure = None
+            
+            def get(self, url, headers=None, timeout=None):
+                self.calls.append(dict(headers or {}))
+                if self.failure == 'error':
+                    raise requests.ConnectionError("unreachable")
+                if self.failure == 'status':
+                    return FakeResponse(500)
+                if headers and headers.get('If-None-Match') == '"v1"':
+                    return FakeResponse(304)
+                return FakeResponse(200, {"plugins": [{"id": "test_plugin"}]}, {"ETag": '"v1"'})
+        
+        fake = FakeSession()
+        original_http = plugin_manager._http
+        original_cache = dict(plugin_manager._REMOTE_CACHE)
+        plugin_manager._http = fake
+        plugin_manager._REMOTE_CACHE.update(etag=None, last_modified=None, parsed=None, fetched_at=0.0)
+        try:
+            first = plugin_manager._fetch_remote_plugins()
+            assert first == [{"id": "test_plugin"}], f"Unexpected plugin list: {first}"
+            assert len(fake.calls) == 1, "First fetch should hit the network"
+            
+            # Within max_age the cached list is returned without a request
+            plugin_manager._fetch_remote_plugins()
+            assert len(fake.calls) == 1, "Fresh cache should not hit the network"
+            
+            # Once stale, the request is conditional and a 304 reuses the cache
+            second = plugin_manager._fetch_remote_plugins(max_age=0)
+            assert len(fake.calls) == 2, "Stale cache should revalidate"
+            assert fake.calls[1].get('If-None-Match') == '"v1"', "ETag not sent on revalidation"
+            assert second is first, "304 response should reuse the cached list"
+            
+            # A failed refresh keeps serving the cached list
+            for failure in ('status', 'error'):
+                fake.failure = failure
+                stale = plugin_manager._fetch_remote_plugins(max_age=0)
+                assert stale is first, f"Cached list not used after {failure} failure"
+            
+            # Without a cached list, a network error is raised
+            plugin_manager._REMOTE_CACHE.update(parsed=None)
+            try:
+                plugin_manager._fetch_remote_plugins(max_age=0)
+                assert False, "Network error without cache should be raised"
+            except requests.ConnectionError:
+                pass
+        finally:
+            plugin_manager._http = original_http
+            plugin_manager._REMOTE_CACHE.update(original_cache)
+        
+        print("✓ Remote plugin index cached and revalidated correctly")
+        return True
+    except Exception as e:
+        print(f"✗ Remote plugin cache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_security_checks():
     """Test security features"""
     print("\nTesting security checks...")
@@ -136,14 +278,17 @@ def test_security_checks():
         install_source = inspect.getsource(plugin_manager.install_plugin)
         uninstall_source = inspect.getsource(plugin_manager.uninstall_plugin)
         
-        assert 'current_user_has_role' in install_source, "Install doesn't check user role"
-        assert 'current_user_has_role' in uninstall_source, "Uninstall doesn't check user role"
-        assert 'admin' in install_source, "Install doesn't require admin role"
-        assert 'admin' in uninstall_source, "Uninstall doesn't require admin role"
+        assert "@require_role('admin'" in install_source, "Install doesn't require admin role"
+        assert "@require_role('admin'" in uninstall_source, "Uninstall doesn't require admin role"
+        
+        require_role_source = inspect.getsource(plugin_manager.require_role)
+        assert 'current_user_has_role' in require_role_source, "require_role doesn't check user role"
         
         # Verify plugin ID validation exists
-        assert 'regex' in install_source.lower() or 're.match' in install_source, "Install doesn't validate plugin ID"
-        assert 'regex' in uninstall_source.lower() or 're.match' in uninstall_source, "Uninstall doesn't validate plugin file"
+        assert '_PLUGIN_ID_RE.fullmatch' in install_source, "Install doesn't validate plugin ID"
+        assert '_PLUGIN_FILE_RE.fullmatch' in uninstall_source, "Uninstall doesn't validate plugin file"
+        assert not plugin_manager._PLUGIN_ID_RE.fullmatch('../etc/passwd'), "Plugin ID regex accepts path traversal"
+        assert not plugin_manager._PLUGIN_FILE_RE.fullmatch('plugin.py\n'), "Plugin file regex accepts trailing newline"
         
         print("✓ Security checks in place")
         return True
@@ -225,7 +370,10 @@ def main():
         test_plugin_manager_blueprint,
         test_plugin_validation,
         test_addon_loader_status,
+        test_device_buttons,
+        test_render_hooks_failure,
         test_remote_plugin_json_format,
+        test_remote_plugin_cache,
         test_security_checks,
         test_path_sanitization,
     ]
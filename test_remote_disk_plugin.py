@@ -118,6 +118,105 @@ def test_command_injection_prevention():
     print("  ✓ All command injection attempts blocked")
     return True
 
+def test_ssh_connection_reuse():
+    """Test that remote commands reuse pooled SSH connections"""
+    print("\nTesting SSH connection reuse...")
+    
+    class FakeStream:
+        def __init__(self, data):
+            self.data = data
+        
+        def read(self):
+            if self.data is None:
+                raise EOFError("connection lost")
+            return self.data
+    
+    class FakeTransport:
+        active = True
+        
+        def is_active(self):
+            return self.active
+        
+        def set_keepalive(self, interval):
+            pass
+    
+    class FakeClient:
+        connects = 0
+        execs = 0
+        fail_read = False
+        
+        def __init__(self):
+            self.transport = FakeTransport()
+        
+        def set_missing_host_key_policy(self, policy):
+            pass
+        
+        def connect(self, *args, **kwargs):
+            FakeClient.connects += 1
+        
+        def get_transport(self):
+            return self.transport
+        
+        def exec_command(self, command):
+            FakeClient.execs += 1
+            return None, FakeStream(None if FakeClient.fail_read else b'ok'), FakeStream(b'')
+        
+        def close(self):
+            self.transport.active = False
+    
+    import ssh_pool
+    original_client = ssh_pool.paramiko.SSHClient
+    ssh_pool.paramiko.SSHClient = FakeClient
+    ssh_pool.close_all()
+    try:
+        for _ in range(3):
+            output, error = remote_disk_plugin.execute_remote_command('192.0.2.1', 22, 'root', 'true')
+            assert output == 'ok' and error is None, f"Unexpected result: {output!r}, {error!r}"
+        assert FakeClient.connects == 1, f"Expected 1 connection, got {FakeClient.connects}"
+        print("  ✓ Repeated commands share one connection")
+        
+        # A dead transport is replaced by a new connection
+        ssh_pool._pool[('192.0.2.1', 22, 'root')][0].transport.active = False
+        remote_disk_plugin.execute_remote_command('192.0.2.1', 22, 'root', 'true')
+        assert FakeClient.connects == 2, "Inactive connection was not replaced"
+        print("  ✓ Inactive connections are reconnected")
+        
+        # A failure after the command was sent is reported, not retried
+        FakeClient.execs = 0
+        FakeClient.fail_read = True
+        output, error = remote_disk_plugin.execute_remote_command('192.0.2.1', 22, 'root', 'wipefs -a /dev/sdz')
+        assert output is None and error, "Read failure was not reported"
+        assert FakeClient.execs == 1, f"Command ran {FakeClient.execs} times"
+        assert ('192.0.2.1', 22, 'root') not in ssh_pool._pool, "Broken connection was not evicted"
+        print("  ✓ Started commands are never re-run")
+    finally:
+        ssh_pool.close_all()
+        ssh_pool.paramiko.SSHClient = original_client
+    
+    return True
+
+def test_snapshot_parsing():
+    """Test parsing of the combined lsblk/smartctl snapshot output"""
+    print("\nTesting remote snapshot parsing...")
+    
+    output = (
+        '{"blockdevices": [{"name": "sda", "size": "100G", "model": "Disk", "type": "disk"},'
+        ' {"name": "sr0", "size": "1G", "model": "CD", "type": "rom"}]}\n'
+        '---SEP---\n'
+        '===sda===\n'
+        'SMART overall-health self-assessment test result: PASSED\n'
+        '===sr0===\n'
+        'Unable to detect device type\n'
+    )
+    snapshot = remote_disk_plugin._parse_snapshot(output)
+    
+    assert [d['name'] for d in snapshot['disks']] == ['sda'], "Only disk devices should be listed"
+    print("  ✓ Disk list parsed")
+    assert snapshot['health'] == {'sda': 'PASSED', 'sr0': None}, f"Unexpected health: {snapshot['health']}"
+    print("  ✓ SMART health parsed per device")
+    
+    return True
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -131,6 +230,8 @@ def main():
         test_plugin_metadata,
         test_plugin_functions,
         test_command_injection_prevention,
+        test_ssh_connection_reuse,
+        test_snapshot_parsing,
     ]
     
     passed = 0
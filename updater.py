@@ -4,12 +4,95 @@ import logging
 import paramiko
 import time
 import subprocess
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import email_config
 import email_notifier
 from constants import is_localhost, is_windows, get_platform
 
 SUPPORTED_DISTRIBUTIONS = ['ubuntu', 'debian', 'fedora', 'centos', 'arch', 'windows']
 
+# Bounded worker pool shared by manual and scheduled updates, so the number of
+# concurrent update sessions stays capped wherever updates are started from
+UPDATE_WORKERS = 8
+UPDATE_POOL = ThreadPoolExecutor(max_workers=UPDATE_WORKERS, thread_name_prefix="updater")
+
+
+class LogBuffer:
+    """
+    Log lines of one update run, keeping only the newest maxlines.
+    Lines are numbered from 0 over the whole run, so readers can resume
+    from an offset even after older lines were dropped.
+    """
+    def __init__(self, maxlines=5000):
+        self._lines = deque(maxlen=maxlines)
+        self._lock = threading.Lock()
+        self.total = 0
+    
+    def append(self, line):
+        with self._lock:
+            self._lines.append(line)
+            self.total += 1
+    
+    def snapshot(self):
+        """Return (lines, total) as a consistent point-in-time copy."""
+        with self._lock:
+            return list(self._lines), self.total
+    
+    def since(self, offset):
+        """Return (lines after offset that are still kept, new offset)."""
+        with self._lock:
+            first = self.total - len(self._lines)
+            start = max(offset, first) - first
+            return list(islice(self._lines, start, None)), self.total
+
+
+class LogStore:
+    """Thread-safe LogBuffers per host name, keeping the maxhosts most recently started."""
+    def __init__(self, maxhosts=128, maxlines=5000):
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxhosts = maxhosts
+        self.maxlines = maxlines
+    
+    def start(self, name):
+        """Replace the log of a host with a new, empty LogBuffer and return it."""
+        buf = LogBuffer(self.maxlines)
+        with self._lock:
+            self._buffers.pop(name, None)
+            self._buffers[name] = buf
+            while len(self._buffers) > self.maxhosts:
+                self._buffers.popitem(last=False)
+        return buf
+    
+    def get(self, name):
+        with self._lock:
+            return self._buffers.get(name)
+
+# Update log lines per host name, bounded in hosts and lines per run
+logs = LogStore()
+# Running or finished update jobs, keyed by host name
+update_jobs = {}
+_UPDATE_LOCK = threading.Lock()
+
+def start_update(name, host, repo_only=False):
+    """
+    Queue an update for a host on UPDATE_POOL, logging to logs[name].
+    Used for manual and scheduled updates alike, so a host is never updated twice at once.
+    Returns the job's Future, or None if an update for this host is already queued or running.
+    """
+    with _UPDATE_LOCK:
+        job = update_jobs.get(name)
+        if job is not None and not job.done():
+            return None
+        job = UPDATE_POOL.submit(
+            run_update, host["host"], host["user"], name, logs.start(name), repo_only
+        )
+        update_jobs[name] = job
+        return job
+
 # Windows Update PowerShell commands
 WINDOWS_UPDATE_BASE = (
     "Install-PackageProvider -Name NuGet -MinimumVersion 2.8.5.201 -Force -ErrorAction SilentlyContinue; "
@@ -94,7 +177,7 @@ def run_local_update(name, log_list, repo_only, log_func):
     
     Args:
         name: Display name for the host (used in logs)
-        log_list: List to append log messages to
+        log_list: List or LogBuffer to append log messages to
         repo_only: If True, only update packages from repositories without modifying config files
         log_func: Logging function to use
     """
@@ -229,7 +312,7 @@ def run_update(host, user, name, log_list, repo_only=False):
         host: Hostname or IP address of the remote system (or 'localhost')
         user: SSH username (ignored for localhost)
         name: Display name for the host (used in logs)
-        log_list: List to append log messages to
+        log_list: List or LogBuffer to append log messages to
         repo_only: If True, only update packages from repositories without modifying config files
     """
     def log(msg):
@@ -267,7 +350,7 @@ def run_update(host, user, name, log_list, repo_only=False):
         log("Detecting operating system...")
         # First, try to detect if it's Windows by checking for PowerShell
         stdin, stdout, stderr = ssh.exec_command(WINDOWS_DETECTION_COMMAND)
-        result = stdout.read().decode().strip().lower()
+        result = stdout.read().decode(errors='replace').strip().lower()
         
         if result == 'windows':
             distro = 'windows'
@@ -276,7 +359,7 @@ def run_update(host, user, name, log_list, repo_only=False):
             # Try Linux detection
             log("Detecting Linux distribution...")
             stdin, stdout, stderr = ssh.exec_command("cat /etc/os-release | grep '^ID=' | cut -d'=' -f2 | tr -d '\"'")
-            distro = stdout.read().decode().strip().lower()
+            distro = stdout.read().decode(errors='replace').strip().lower()
             if distro:
                 log(f"Detected Linux distribution: {distro}")
             else:
@@ -321,12 +404,7 @@ def run_update(host, user, name, log_list, repo_only=False):
             log(error_msg)
             error_occurred = True
             error_details.append(f"Update failed with exit code {exit_status}")
-            
-            # Read any error messages
-            errors = stderr.read().decode().strip()
-            if errors:
-                log(f"Errors: {errors}")
-                error_details.append(f"Error output: {errors}")
+            # With a pty, stderr is merged into stdout, so the error output has already been logged above
         
     except paramiko.AuthenticationException:
         error_msg = f"✗ Authentication failed for {name}. Check SSH keys or credentials."
@@ -8,7 +8,7 @@ from pathlib import Path
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
-from flask import session, redirect, url_for, flash, request
+from flask import session, redirect, url_for, flash, request, g, has_app_context
 
 # Database file for user management
 USER_DB_FILE = Path(__file__).parent / 'users.db'
@@ -232,6 +232,52 @@ def get_user_role_names(user_id):
     roles = get_user_roles(user_id)
     return [role['name'] for role in roles]
 
+def get_role_names_by_user():
+    """Get role names of all users in one query, as {user_id: [role names]}; users without roles are omitted."""
+    roles_by_user = {}
+    with get_user_db() as db:
+        for row in db.execute('''
+            SELECT ur.user_id, r.name FROM user_roles ur
+            JOIN roles r ON r.id = ur.role_id
+        '''):
+            roles_by_user.setdefault(row['user_id'], []).append(row['name'])
+    return roles_by_user
+
+def get_cached_user_role_names(user_id):
+    """
+    Get role names for a user as a set, cached on flask.g for the current request.
+    
+    Repeated role checks while handling one request only query the database once.
+    Outside of an application context this falls back to an uncached lookup.
+    """
+    if not has_app_context():
+        return frozenset(get_user_role_names(user_id))
+    roles = g.get('_roles')
+    if roles is None or g.get('_roles_uid') != user_id:
+        roles = frozenset(get_user_role_names(user_id))
+        g._roles = roles
+        g._roles_uid = user_id
+    return roles
+
+def current_user_has_role(*roles):
+    """
+    Check if the current logged-in user has any of the specified roles.
+    The result is memoized on flask.g for the rest of the request.
+    """
+    user_id = session.get("user_id")
+    if not user_id:
+        return False
+    wanted = frozenset(roles)
+    key = (user_id, wanted)
+    cache = g.setdefault('_role_check', {})
+    if key in cache:
+        return cache[key]
+    user_roles = get_cached_user_role_names(user_id)
+    # Admin has access to everything
+    result = 'admin' in user_roles or not user_roles.isdisjoint(wanted)
+    cache[key] = result
+    return result
+
 def user_has_role(user_id, role_name):
     """Check if user has a specific role."""
     role_names = get_user_role_names(user_id)
@@ -303,6 +349,9 @@ def role_required(*required_roles):
     Decorator to require specific roles.
     Usage: @role_required('admin', 'operator')
     """
+    # Admin has access to everything
+    allowed = frozenset(required_roles) | {'admin'}
+    
     def decorator(f):
         @wraps(f)
         def wrapped(*args, **kwargs):
@@ -310,14 +359,8 @@ def role_required(*required_roles):
             if not user_id:
                 return redirect(url_for('login', next=request.path))
             
-            user_roles = get_user_role_names(user_id)
-            
-            # Admin has access to everything
-            if 'admin' in user_roles:
-                return f(*args, **kwargs)
-            
-            # Check if user has any of the required roles
-            if any(role in user_roles for role in required_roles):
+            # Check if user has admin or any of the required roles
+            if not allowed.isdisjoint(get_cached_user_role_names(user_id)):
                 return f(*args, **kwargs)
             
             flash('You do not have permission to access this page.')
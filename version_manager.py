@@ -240,7 +240,8 @@ def perform_self_update(preserve_configs=True):
             "disks.db",
             ".env",
             "operations.db",
-            "smart.db"
+            "smart.db",
+            ".secret_key"
         ]
         
         backup_dir = "/tmp/dashboard_backup_" + str(int(time.time()))
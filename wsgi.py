@@ -0,0 +1,13 @@
+"""
+WSGI entry point for running the dashboard under a production server, e.g.:
+
+    gunicorn -k gthread -w 1 --threads 8 -b 0.0.0.0:5000 wsgi:application
+
+Keep a single worker process: update logs, running jobs and the scheduler
+live in process memory and must not be duplicated across workers.
+"""
+from app import app, init_services
+
+init_services()
+
+application = app